@@ -0,0 +1,149 @@
+from decimal import Decimal
+
+from django.db import models
+from django.utils import timezone
+
+# Divisor that turns one billing period's cost into a monthly amount
+MONTHS_PER_CYCLE = {
+    'monthly': 1,
+    'quarterly': 3,
+    'yearly': 12,
+}
+CENT = Decimal('0.01')
+
+
+def monthly_value(cost, billing_cycle):
+    """Normalize a per-period cost to its monthly recurring amount"""
+    if cost is None:
+        return Decimal('0.00')
+    months = MONTHS_PER_CYCLE.get(billing_cycle, 1)
+    return (Decimal(cost) / months).quantize(CENT)
+
+
+def apply_rollup(plan_id, billing_cycle, day, **deltas):
+    """Add deltas to one (plan, billing_cycle, day) rollup row, creating it if needed"""
+    from .models import RevenueRollup
+
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    row, _ = RevenueRollup.objects.get_or_create(
+        day=day, plan_id=plan_id, billing_cycle=billing_cycle
+    )
+    RevenueRollup.objects.filter(pk=row.pk).update(
+        updated_at=timezone.now(),
+        **{field: models.F(field) + value for field, value in deltas.items()}
+    )
+
+
+def record_subscription_change(subscription, old_status, renewal=False):
+    """Roll up a subscription moving into or out of the active state"""
+    was_active = old_status == 'active'
+    is_active = subscription.status == 'active'
+    if was_active == is_active:
+        return
+
+    billing_cycle = subscription.plan.billing_cycle
+    value = monthly_value(subscription.cost_at_signup, billing_cycle)
+    if is_active:
+        deltas = {'mrr_change': value}
+        if old_status is None:
+            counter = 'renewed_subscriptions' if renewal else 'new_subscriptions'
+            deltas[counter] = 1
+    else:
+        deltas = {'mrr_change': -value}
+        if not renewal:
+            deltas['churned_subscriptions'] = 1
+    apply_rollup(subscription.plan_id, billing_cycle, timezone.localdate(), **deltas)
+
+
+def _group_by_plan(subscriptions):
+    return subscriptions.filter(status='active').order_by().values(
+        'plan_id', 'plan__billing_cycle'
+    ).annotate(
+        total=models.Count('id'),
+        cost=models.Sum('cost_at_signup')
+    )
+
+
+def record_bulk_deactivation(subscriptions, renewal=False):
+    """Roll up active subscriptions about to leave the active state in bulk"""
+    day = timezone.localdate()
+    for row in _group_by_plan(subscriptions):
+        billing_cycle = row['plan__billing_cycle']
+        deltas = {'mrr_change': -monthly_value(row['cost'], billing_cycle)}
+        if not renewal:
+            deltas['churned_subscriptions'] = row['total']
+        apply_rollup(row['plan_id'], billing_cycle, day, **deltas)
+
+
+def record_bulk_activation(subscriptions, renewal=False):
+    """Roll up newly created active subscriptions in bulk"""
+    counter = 'renewed_subscriptions' if renewal else 'new_subscriptions'
+    day = timezone.localdate()
+    for row in _group_by_plan(subscriptions):
+        billing_cycle = row['plan__billing_cycle']
+        apply_rollup(
+            row['plan_id'], billing_cycle, day,
+            mrr_change=monthly_value(row['cost'], billing_cycle),
+            **{counter: row['total']}
+        )
+
+
+def record_payment_change(payment, old_status):
+    """Roll up a payment becoming completed, or leaving completed (refunds)"""
+    was_completed = old_status == 'completed'
+    is_completed = payment.status == 'completed'
+    if was_completed == is_completed:
+        return
+
+    plan = payment.subscription.plan
+    amount = payment.amount if is_completed else -payment.amount
+    day = timezone.localdate(payment.payment_date)
+    apply_rollup(plan.id, plan.billing_cycle, day, revenue=amount)
+
+
+def revenue_summary(date_from, date_to, plan_id=None, billing_cycle=None):
+    """MRR, churn and revenue for a day range, read from the rollup table"""
+    from .models import RevenueRollup
+
+    rollups = RevenueRollup.objects.order_by()
+    if plan_id:
+        rollups = rollups.filter(plan_id=plan_id)
+    if billing_cycle:
+        rollups = rollups.filter(billing_cycle=billing_cycle)
+
+    sums = {
+        'revenue': models.Sum('revenue'),
+        'new_subscriptions': models.Sum('new_subscriptions'),
+        'renewed_subscriptions': models.Sum('renewed_subscriptions'),
+        'churned_subscriptions': models.Sum('churned_subscriptions'),
+        'mrr_change': models.Sum('mrr_change'),
+    }
+    mrr = rollups.filter(day__lt=date_from).aggregate(
+        total=models.Sum('mrr_change')
+    )['total'] or Decimal('0.00')
+    mrr_start = mrr
+
+    in_range = rollups.filter(day__gte=date_from, day__lte=date_to)
+    by_day = []
+    for row in in_range.values('day').annotate(**sums).order_by('day'):
+        mrr += row['mrr_change']
+        row['mrr'] = mrr
+        by_day.append(row)
+
+    by_plan = list(
+        in_range.values('plan_id', 'plan__name', 'billing_cycle').annotate(**sums).order_by('plan__name')
+    )
+
+    totals = {
+        field: value or 0 for field, value in in_range.aggregate(**sums).items()
+    }
+    totals.update(mrr_start=mrr_start, mrr_end=mrr)
+    return {
+        'date_from': date_from,
+        'date_to': date_to,
+        'totals': totals,
+        'by_day': by_day,
+        'by_plan': by_plan,
+    }
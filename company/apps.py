@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "company"
+
+    def ready(self):
+        from .models import SubscriptionPlan
+        from .plan_cache import invalidate_plan
+        from .query_budget import install_query_recorder
+        from .sqlite import apply_sqlite_pragmas
+
+        post_save.connect(invalidate_plan, sender=SubscriptionPlan, dispatch_uid="plan_cache_save")
+        post_delete.connect(invalidate_plan, sender=SubscriptionPlan, dispatch_uid="plan_cache_delete")
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid="sqlite_pragmas")
+        connection_created.connect(install_query_recorder, dispatch_uid="query_budget")
@@ -0,0 +1,102 @@
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from .models import Company, Subscription, Payment, User
+from .pagination import UserPagination
+from .renderers import ORJSONRenderer
+from .replicas import allow_replica_reads
+from .serializers import CompanyDetailSerializer, SubscriptionDetailSerializer, UserSerializer
+
+# Async read endpoints: plain Django views on the async ORM, serving the same
+# representations as the DRF viewsets. Run under notes_api.asgi so that slow
+# clients wait on the event loop instead of holding a worker thread. All of
+# them are reads, so they use the replica when one is configured.
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(
+        ORJSONRenderer().render(data), status=status_code, content_type='application/json'
+    )
+
+
+def not_found():
+    return json_response({'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND)
+
+
+async def _subscription_detail(subscription):
+    subscription.prefetched_payments = [
+        payment async for payment in Payment.objects.filter(subscription_id=subscription.pk)
+    ]
+    return SubscriptionDetailSerializer(subscription).data
+
+
+@require_GET
+async def company_detail(request, pk):
+    """Company with its active subscription and users"""
+    allow_replica_reads()
+    try:
+        company = await Company.objects.select_related('active_subscription').aget(pk=pk)
+    except Company.DoesNotExist:
+        return not_found()
+    company.prefetched_users = [user async for user in User.objects.filter(company_id=pk)]
+    return json_response(CompanyDetailSerializer(company).data)
+
+
+@require_GET
+async def subscription_detail(request, pk):
+    """Subscription with its company, plan and payments"""
+    allow_replica_reads()
+    try:
+        subscription = await Subscription.objects.select_related('company', 'plan').aget(pk=pk)
+    except Subscription.DoesNotExist:
+        return not_found()
+    return json_response(await _subscription_detail(subscription))
+
+
+@require_GET
+async def active_subscription(request, pk):
+    """The company's active subscription, through the denormalized pointer"""
+    allow_replica_reads()
+    try:
+        company = await Company.objects.select_related(
+            'active_subscription__company', 'active_subscription__plan'
+        ).aget(pk=pk)
+    except Company.DoesNotExist:
+        return not_found()
+    if not company.active_subscription:
+        return json_response(
+            {'detail': 'No active subscription found.'}, status.HTTP_404_NOT_FOUND
+        )
+    return json_response(await _subscription_detail(company.active_subscription))
+
+
+@require_GET
+async def users_by_company(request):
+    """A company's users by username; follow `next` (?after=<username>) for more"""
+    allow_replica_reads()
+    company_id = request.GET.get('company_id')
+    if not company_id or not company_id.isdigit():
+        return json_response({'error': 'company_id required'}, status.HTTP_400_BAD_REQUEST)
+    try:
+        page_size = min(
+            int(request.GET.get('page_size', UserPagination.page_size)),
+            UserPagination.max_page_size
+        )
+    except ValueError:
+        page_size = UserPagination.page_size
+
+    users = User.objects.filter(company_id=company_id).order_by('username')
+    if request.GET.get('after'):
+        users = users.filter(username__gt=request.GET['after'])
+    page = [user async for user in users[:page_size + 1]]
+
+    next_url = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        query = request.GET.copy()
+        query['after'] = page[-1].username
+        next_url = request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+    return json_response({
+        'next': next_url,
+        'results': UserSerializer(page, many=True).data
+    })
@@ -0,0 +1,58 @@
+import hashlib
+
+from django.db.models import Count, F, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """Answer retrieve with 304 Not Modified, validated from updated_at.
+
+    Details use the row's updated_at together with every nested relation the
+    detail serializer renders, so a stale nested payload never validates.
+    Lists are left alone: MAX(updated_at) over a filtered list scans every
+    matching row on every cursor page. A view whose list state is cheap (the
+    plan list, from the plan cache) passes it to _conditional_response.
+    """
+    # To-one relations nested in the detail representation
+    conditional_related = ()
+    # To-many relations nested in the detail representation
+    conditional_related_many = ()
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        annotations = {}
+        for path in self.conditional_related:
+            annotations[f'{path}_updated_at'] = F(f'{path}__updated_at')
+        for path in self.conditional_related_many:
+            annotations[f'{path}_updated_at'] = Max(f'{path}__updated_at')
+            annotations[f'{path}_count'] = Count(path)
+        try:
+            state = self.filter_queryset(self.get_queryset()).order_by().filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            ).values('pk', 'updated_at').annotate(**annotations).first()
+        except (TypeError, ValueError):
+            state = None
+        if state is None:
+            # Let the regular lookup produce the 404
+            return super().retrieve(request, *args, **kwargs)
+        return self._conditional_response(state, super().retrieve, request, *args, **kwargs)
+
+    def _conditional_response(self, state, render, request, *args, **kwargs):
+        timestamps = [
+            value for name, value in state.items()
+            if name.endswith('updated_at') and value is not None
+        ]
+        last_modified = int(max(timestamps).timestamp()) if timestamps else None
+        etag = quote_etag(hashlib.md5(
+            '|'.join(f'{name}={value}' for name, value in state.items()).encode()
+        ).hexdigest())
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
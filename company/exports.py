@@ -0,0 +1,75 @@
+import csv
+import json
+from io import StringIO
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
+from datetime import datetime, time
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def parse_export_bound(value, end_of_day=False):
+    """Parse an ISO date or datetime query value into an aware datetime"""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value}")
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_export_params(query_params):
+    """Return (file_format, date_from, date_to) from export query params"""
+    file_format = query_params.get('file_format', 'csv')
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError("file_format must be csv or ndjson")
+    date_from = parse_export_bound(query_params.get('date_from'))
+    date_to = parse_export_bound(query_params.get('date_to'), end_of_day=True)
+    return file_format, date_from, date_to
+
+
+def _csv_chunks(fields, rows):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_chunks(fields, rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder))
+        if len(lines) == EXPORT_CHUNK_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def stream_export(queryset, fields, file_format, filename):
+    """Stream queryset rows as CSV or NDJSON without loading them all"""
+    rows = queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    chunks = _csv_chunks if file_format == 'csv' else _ndjson_chunks
+    response = StreamingHttpResponse(
+        chunks(fields, rows), content_type=EXPORT_FORMATS[file_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{file_format}"'
+    return response
@@ -0,0 +1,107 @@
+import decimal
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.relations import PrimaryKeyRelatedField
+
+# Fields whose output is the database value itself
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField, serializers.CharField, serializers.ChoiceField,
+    serializers.FloatField, serializers.IntegerField, PrimaryKeyRelatedField,
+)
+# Fields whose to_representation formats the database value
+CONVERTED_FIELDS = (
+    serializers.DateField, serializers.DateTimeField, serializers.DecimalField,
+    serializers.DurationField, serializers.TimeField, serializers.UUIDField,
+)
+
+
+def _datetime_converter(field):
+    """DateTimeField.to_representation with format and timezone resolved once"""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        text = value.astimezone(field_timezone).isoformat()
+        return text[:-6] + 'Z' if text.endswith('+00:00') else text
+    return convert
+
+
+def _decimal_converter(field):
+    """DecimalField.to_representation with the quantize exponent and context built once"""
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.normalize_output or field.decimal_places is None:
+        return field.to_representation
+
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return f'{value.quantize(exponent, rounding=rounding, context=context):f}'
+    return convert
+
+
+def values_plan(serializer):
+    """(output name, values() source, converter or None) for each readable field"""
+    plan = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.DateTimeField):
+            converter = _datetime_converter(field)
+        elif isinstance(field, serializers.DecimalField):
+            converter = _decimal_converter(field)
+        elif isinstance(field, CONVERTED_FIELDS):
+            converter = field.to_representation
+        elif isinstance(field, PASSTHROUGH_FIELDS):
+            converter = None
+        else:
+            raise ImproperlyConfigured(
+                f"{type(serializer).__name__}.{name} ({type(field).__name__}) has no values() mapping"
+            )
+        plan.append((name, field.source, converter))
+    return plan
+
+
+def values_rows(rows, plan):
+    """Map values() dicts straight to the dicts the serializer would produce"""
+    output = []
+    for row in rows:
+        item = {}
+        for name, source, converter in plan:
+            value = row[source]
+            item[name] = converter(value) if converter is not None and value is not None else value
+        output.append(item)
+    return output
+
+
+class ValuesListMixin:
+    """Opt-in list path (?fast=true) that skips model and serializer instances"""
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('fast') not in ('1', 'true'):
+            return super().list(request, *args, **kwargs)
+
+        plan = values_plan(self.get_serializer())
+        sources = {source for _, source, _ in plan}
+        # The cursor paginator reads its position from the ordering fields,
+        # which it finds on plain dicts just as on instances
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        sources.update(field.lstrip('-') for field in ordering)
+        queryset = self.filter_queryset(self.get_queryset()).values(*sources)
+
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(values_rows(queryset, plan))
+        return self.get_paginated_response(values_rows(page, plan))
@@ -0,0 +1,136 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from company.models import Company, SubscriptionPlan, Subscription, User
+
+# Hot-path indexes compared by this benchmark, by model
+BENCHMARK_INDEXES = [
+    (Subscription, 'subscriptions_active_end_idx'),
+    (User, 'users_company_active_idx'),
+    (User, 'users_active_staff_idx'),
+]
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway dataset and compare query plans and timings of the '
+        'expiry, seat and admin-lookup queries with and without their indexes. '
+        'Everything runs in one transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=2000)
+        parser.add_argument('--users-per-company', type=int, default=25)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query')
+
+    def handle(self, *args, **options):
+        # The indexes are dropped inside the transaction; only a rollback
+        # brings them back, so DDL that commits implicitly (MySQL, Oracle)
+        # would lose them for good
+        if not connection.features.can_rollback_ddl:
+            raise CommandError(
+                f'{connection.vendor} commits DDL implicitly; run this benchmark on a '
+                'database with transactional DDL (SQLite, PostgreSQL)'
+            )
+        with transaction.atomic():
+            company_ids = self._seed(options['companies'], options['users_per_company'])
+            queries = self._hot_queries(company_ids)
+
+            self.stdout.write(self.style.MIGRATE_HEADING('With indexes'))
+            self._report(queries, options['repeat'], 'with indexes')
+
+            self._drop_indexes()
+            self.stdout.write(self.style.MIGRATE_HEADING('Without indexes'))
+            self._report(queries, options['repeat'], 'without indexes')
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Benchmark data rolled back'))
+
+    def _seed(self, company_count, users_per_company):
+        rng = random.Random(42)
+        now = timezone.now()
+        plan = SubscriptionPlan.objects.create(
+            name=f'Benchmark Plan {now.timestamp()}',
+            billing_cycle='monthly',
+            pricing_model='flat_fee',
+            cost='10.00'
+        )
+        companies = Company.objects.bulk_create([
+            Company(name=f'Benchmark Company {now.timestamp()} {i}')
+            for i in range(company_count)
+        ], batch_size=1000)
+        Subscription.objects.bulk_create([
+            Subscription(
+                company=company,
+                plan=plan,
+                status=rng.choice(['active', 'active', 'active', 'expired']),
+                start_date=now - timedelta(days=30),
+                end_date=now + timedelta(days=rng.randint(-30, 365)),
+                cost_at_signup=plan.cost
+            )
+            for company in companies
+        ], batch_size=1000)
+        User.objects.bulk_create([
+            User(
+                username=f'bench-{now.timestamp()}-{company.id}-{i}',
+                email=f'user{i}@company{company.id}.example.com',
+                company=company,
+                is_active=rng.random() < 0.9,
+                is_staff=i == 0
+            )
+            for company in companies
+            for i in range(users_per_company)
+        ], batch_size=1000)
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        return [company.id for company in companies]
+
+    def _hot_queries(self, company_ids):
+        now = timezone.now()
+        sample = company_ids[:200]
+        return {
+            # As send_expiry_notifications runs it
+            'expiry scan': Subscription.objects.expiring_soon(now=now).order_by('end_date'),
+            'seat count': User.objects.filter(
+                company_id=company_ids[len(company_ids) // 2],
+                is_active=True
+            ).order_by().values('id'),
+            'admin lookup': User.objects.filter(
+                company_id__in=sample,
+                is_active=True,
+                is_staff=True
+            ).exclude(email='').order_by().values_list('company_id', 'email'),
+        }
+
+    def _report(self, queries, repeat, phase):
+        for name, queryset in queries.items():
+            plan = self._explain(queryset, phase)
+            started = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset.all())
+            elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+            self.stdout.write(f'{name}: {elapsed_ms:.2f} ms/query')
+            for line in plan:
+                self.stdout.write(f'    {line}')
+
+    def _explain(self, queryset, phase):
+        # The phase comment keeps the SQL text unique, so the driver's
+        # statement cache cannot return a plan prepared before the drop
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql} /* {phase} */', params)
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+
+    def _drop_indexes(self):
+        editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model, name in BENCHMARK_INDEXES:
+                cursor.execute(editor.sql_delete_index % {
+                    'table': editor.quote_name(model._meta.db_table),
+                    'name': editor.quote_name(name),
+                })
@@ -0,0 +1,81 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from company.parsers import ORJSONParser
+from company.renderers import ORJSONRenderer
+
+class Command(BaseCommand):
+    help = (
+        'Time the stock JSON renderer and parser against the orjson ones on '
+        'payment-shaped list pages, checking the output is byte-identical.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per page')
+        parser.add_argument('--repeat', type=int, default=50, help='Timed runs per case')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        # As emitted by PaymentSerializer: decimals and datetimes already strings
+        serialized = [
+            {
+                'id': i,
+                'amount': '99.99',
+                'method': 'credit_card',
+                'status': 'completed',
+                'payment_date': (now - timedelta(minutes=i)).isoformat().replace('+00:00', 'Z'),
+                'notes': None,
+                'created_at': now.isoformat().replace('+00:00', 'Z'),
+                'updated_at': now.isoformat().replace('+00:00', 'Z'),
+                'subscription': i // 3,
+            }
+            for i in range(options['rows'])
+        ]
+        # Raw values, as in hand-built responses, go through the encoder hooks
+        raw = [
+            dict(row, amount=Decimal('99.99'), payment_date=now - timedelta(minutes=row['id']))
+            for row in serialized
+        ]
+
+        for name, data in (('serialized page', serialized), ('raw values page', raw)):
+            self._compare_render(name, data, options['repeat'])
+        self._compare_parse(JSONRenderer().render(serialized), options['repeat'])
+
+    def _time(self, func, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) * 1000 / repeat
+
+    def _report(self, name, stock_ms, fast_ms):
+        self.stdout.write(
+            f'{name}: json {stock_ms:.2f} ms, orjson {fast_ms:.2f} ms ({stock_ms / fast_ms:.1f}x)'
+        )
+
+    def _compare_render(self, name, data, repeat):
+        stock, fast = JSONRenderer(), ORJSONRenderer()
+        if stock.render(data) != fast.render(data):
+            self.stdout.write(self.style.ERROR(f'{name}: rendered bytes differ'))
+            return
+        self._report(
+            f'render {name}',
+            self._time(lambda: stock.render(data), repeat),
+            self._time(lambda: fast.render(data), repeat)
+        )
+
+    def _compare_parse(self, body, repeat):
+        stock, fast = JSONParser(), ORJSONParser()
+        if stock.parse(BytesIO(body)) != fast.parse(BytesIO(body)):
+            self.stdout.write(self.style.ERROR('parse: parsed data differs'))
+            return
+        self._report(
+            'parse serialized page',
+            self._time(lambda: stock.parse(BytesIO(body)), repeat),
+            self._time(lambda: fast.parse(BytesIO(body)), repeat)
+        )
@@ -0,0 +1,102 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from company.fast_read import values_plan, values_rows
+from company.models import Company, SubscriptionPlan, Subscription, Payment, User
+from company.serializers import PaymentSerializer, SubscriptionSerializer, UserSerializer
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway dataset and compare the serializer list path with '
+        'the values() fast path for payments, subscriptions and users. '
+        'Everything runs in one transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Rows seeded per model')
+        parser.add_argument('--page-size', type=int, default=1000, help='Rows per timed page')
+        parser.add_argument('--repeat', type=int, default=10, help='Timed runs per path')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options['rows'])
+            page_size = options['page_size']
+            cases = [
+                ('payments', PaymentSerializer, Payment.objects.order_by('payment_date', 'id')),
+                ('subscriptions', SubscriptionSerializer, Subscription.objects.order_by('start_date', 'id')),
+                ('users', UserSerializer, User.objects.order_by('username')),
+            ]
+            for name, serializer_class, queryset in cases:
+                self._compare(name, serializer_class, queryset[:page_size], options['repeat'])
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Benchmark data rolled back'))
+
+    def _seed(self, rows):
+        now = timezone.now()
+        plan = SubscriptionPlan.objects.create(
+            name=f'Benchmark Plan {now.timestamp()}',
+            billing_cycle='monthly',
+            pricing_model='flat_fee',
+            cost='10.00'
+        )
+        companies = Company.objects.bulk_create([
+            Company(name=f'Benchmark Company {now.timestamp()} {i}') for i in range(rows)
+        ], batch_size=1000)
+        subscriptions = Subscription.objects.bulk_create([
+            Subscription(
+                company=company,
+                plan=plan,
+                start_date=now - timedelta(minutes=i),
+                end_date=now + timedelta(days=30),
+                cost_at_signup=plan.cost
+            )
+            for i, company in enumerate(companies)
+        ], batch_size=1000)
+        Payment.objects.bulk_create([
+            Payment(
+                subscription=subscription,
+                amount=Decimal('10.00'),
+                method='credit_card',
+                payment_date=now - timedelta(minutes=i)
+            )
+            for i, subscription in enumerate(subscriptions)
+        ], batch_size=1000)
+        User.objects.bulk_create([
+            User(
+                username=f'bench-{now.timestamp()}-{i}',
+                email=f'user{i}@example.com',
+                company=company
+            )
+            for i, company in enumerate(companies)
+        ], batch_size=1000)
+
+    def _compare(self, name, serializer_class, queryset, repeat):
+        plan = values_plan(serializer_class())
+        sources = {source for _, source, _ in plan}
+
+        def serializer_path():
+            return serializer_class(list(queryset), many=True).data
+
+        def fast_path():
+            return values_rows(queryset.values(*sources), plan)
+
+        if [dict(row) for row in serializer_path()] != fast_path():
+            self.stdout.write(self.style.ERROR(f'{name}: fast path output differs from the serializer'))
+            return
+
+        timings = {}
+        for label, path in (('serializer', serializer_path), ('values', fast_path)):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                path()
+            timings[label] = (time.perf_counter() - started) * 1000 / repeat
+        self.stdout.write(
+            f"{name}: serializer {timings['serializer']:.2f} ms/page, "
+            f"values {timings['values']:.2f} ms/page "
+            f"({timings['serializer'] / timings['values']:.1f}x)"
+        )
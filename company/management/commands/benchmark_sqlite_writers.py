@@ -0,0 +1,141 @@
+import json
+import logging
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import RequestFactory, override_settings
+from company.models import Company, SubscriptionPlan, Subscription
+
+# Connection settings of the stock setup versus the production profile; keep
+# 'tuned' in step with notes_api.settings_sqlite
+PHASES = {
+    'default': {
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {},
+        'SQLITE_PRAGMAS': None,
+    },
+    'tuned': {
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'timeout': 20, 'transaction_mode': 'IMMEDIATE'},
+        'SQLITE_PRAGMAS': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 268435456,
+            'cache_size': -65536,
+            'temp_store': 'MEMORY',
+        },
+    },
+}
+
+class Command(BaseCommand):
+    help = (
+        'Drive concurrent payment and user writes through the full WSGI stack '
+        'against scratch SQLite files, once with the stock connection settings '
+        'and once with the production profile (notes_api.settings_sqlite).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Concurrent writer threads')
+        parser.add_argument('--requests', type=int, default=50, help='Requests per writer')
+
+    def handle(self, *args, **options):
+        if connections.settings[DEFAULT_DB_ALIAS]['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('This benchmark only applies to SQLite')
+        # Every alias, the replica included, moves to the scratch file; a
+        # replica left on the real database would serve the benchmark's reads
+        originals = {
+            alias: {key: db_settings.get(key) for key in ('NAME', 'CONN_MAX_AGE', 'OPTIONS')}
+            for alias, db_settings in connections.settings.items()
+        }
+        scratch = Path(tempfile.mkdtemp())
+        # Lock errors surface as 500s; count them instead of logging each one
+        request_logger = logging.getLogger('django.request')
+        request_logger.disabled = True
+        try:
+            for phase, config in PHASES.items():
+                connections.close_all()
+                for db_settings in connections.settings.values():
+                    db_settings.update(
+                        NAME=str(scratch / f'{phase}.sqlite3'),
+                        CONN_MAX_AGE=config['CONN_MAX_AGE'],
+                        OPTIONS=config['OPTIONS']
+                    )
+                # A cheap hasher keeps password hashing from drowning out the database
+                with override_settings(
+                    SQLITE_PRAGMAS=config['SQLITE_PRAGMAS'],
+                    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+                ):
+                    call_command('migrate', verbosity=0)
+                    self._report(phase, self._run(self._seed(), options))
+                    connections.close_all()
+        finally:
+            request_logger.disabled = False
+            connections.close_all()
+            for alias, original in originals.items():
+                connections.settings[alias].update(original)
+            shutil.rmtree(scratch)
+
+    def _seed(self):
+        plan = SubscriptionPlan.objects.create(
+            name='Benchmark Plan', billing_cycle='monthly', pricing_model='flat_fee', cost='10.00'
+        )
+        company = Company.objects.create(name='Benchmark Company')
+        return Subscription.objects.create(company=company, plan=plan)
+
+    def _run(self, subscription, options):
+        handler = WSGIHandler()
+        factory = RequestFactory(SERVER_NAME='localhost')
+        results = []
+        lock = threading.Lock()
+
+        def writer(worker):
+            latencies, failures = [], 0
+            for i in range(options['requests']):
+                if i % 2:
+                    path, body = '/api/users/', {
+                        'username': f'bench-{worker}-{i}', 'password': 'bench-password',
+                        'email': f'bench-{worker}-{i}@example.com',
+                        'company': subscription.company_id,
+                    }
+                else:
+                    path, body = '/api/payments/', {
+                        'subscription': subscription.pk, 'amount': '10.00', 'method': 'credit_card',
+                    }
+                environ = factory.post(path, json.dumps(body), content_type='application/json').environ
+                started = time.perf_counter()
+                status_line = []
+                response = handler(environ, lambda status, headers: status_line.append(status))
+                b''.join(response)
+                # Fires request_finished, which closes or keeps the connection per CONN_MAX_AGE
+                response.close()
+                latencies.append(time.perf_counter() - started)
+                if not status_line[0].startswith('201'):
+                    failures += 1
+            connections.close_all()
+            with lock:
+                results.append((latencies, failures))
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(options['writers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started, results
+
+    def _report(self, phase, outcome):
+        elapsed, results = outcome
+        latencies = sorted(latency for latency_list, _ in results for latency in latency_list)
+        failures = sum(failed for _, failed in results)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f'{phase}: {len(latencies) / elapsed:.1f} writes/s, p95 {p95 * 1000:.1f} ms, '
+            f'{failures} of {len(latencies)} failed ({elapsed:.2f}s)'
+        )
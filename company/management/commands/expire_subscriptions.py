@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from company.analytics import record_bulk_deactivation
+from company.models import Company, Subscription, User
+
+class Command(BaseCommand):
+    help = 'Expire active subscriptions past their end_date and deactivate their users'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Subscriptions expired per transaction'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        now = timezone.now()
+        started = time.perf_counter()
+
+        overdue = Subscription.objects.filter(
+            status='active',
+            end_date__lte=now
+        ).order_by('id')
+
+        expired_count = 0
+        deactivated_count = 0
+        chunk_count = 0
+        last_id = 0
+        while True:
+            candidate_ids = list(
+                overdue.filter(id__gt=last_id).values_list('id', flat=True)[:chunk_size]
+            )
+            if not candidate_ids:
+                break
+            last_id = candidate_ids[-1]
+
+            with transaction.atomic():
+                # Lock and re-check the chunk: a payment may have extended or
+                # a renewal replaced some of these rows since they were read
+                rows = list(
+                    overdue.filter(id__in=candidate_ids)
+                    .select_for_update()
+                    .values_list('id', 'company_id')
+                )
+                subscription_ids = [subscription_id for subscription_id, _ in rows]
+                company_ids = {company_id for _, company_id in rows}
+
+                overdue_chunk = Subscription.objects.filter(id__in=subscription_ids)
+                record_bulk_deactivation(overdue_chunk)
+                expired_count += overdue_chunk.update(status='expired', updated_at=now)
+                Company.objects.filter(
+                    active_subscription_id__in=subscription_ids
+                ).update(active_subscription=None, updated_at=now)
+                # Only the companies whose subscription actually expired
+                deactivated_count += User.objects.filter(
+                    company_id__in=company_ids,
+                    is_active=True
+                ).update(is_active=False, updated_at=now)
+                Company.objects.filter(id__in=company_ids).update(active_user_count=0)
+            chunk_count += 1
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Expired {expired_count} subscriptions and deactivated '
+                f'{deactivated_count} users in {chunk_count} chunks ({elapsed:.2f}s)'
+            )
+        )
@@ -0,0 +1,89 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+class Command(BaseCommand):
+    help = (
+        'Fire concurrent GETs at running servers and compare throughput, e.g. '
+        '`gunicorn notes_api.wsgi --threads 8 -b :8000` against '
+        '`uvicorn notes_api.asgi:application --port 8001`: '
+        'load_test --target wsgi=http://127.0.0.1:8000/api/companies/1/ '
+        '--target asgi=http://127.0.0.1:8001/api/async/companies/1/'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', action='append', required=True,
+            help='label=url; repeat to compare servers'
+        )
+        parser.add_argument('--concurrency', type=int, default=100, help='Open connections at once')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per target')
+        parser.add_argument(
+            '--client-delay', type=float, default=0.0,
+            help='Seconds each client stalls mid-request, to mimic slow connections'
+        )
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        for target in options['target']:
+            label, sep, url = target.partition('=')
+            if not sep or urlsplit(url).scheme != 'http':
+                raise CommandError(f'Expected label=http://host:port/path, got {target}')
+            result = asyncio.run(self._run(url, options))
+            self._report(label, result)
+
+    async def _run(self, url, options):
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path = f'{path}?{parts.query}'
+        host, port = parts.hostname, parts.port or 80
+        headers = f'Host: {parts.netloc}\r\nAccept: application/json\r\nConnection: close\r\n\r\n'.encode()
+        request_line = f'GET {path} HTTP/1.1\r\n'.encode()
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        latencies, errors = [], []
+
+        async def fetch():
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(host, port), options['timeout']
+                    )
+                    # Send the request line, stall, then finish the headers, so
+                    # the server holds the connection like a slow client's
+                    writer.write(request_line)
+                    await writer.drain()
+                    if options['client_delay']:
+                        await asyncio.sleep(options['client_delay'])
+                    writer.write(headers)
+                    await writer.drain()
+                    response = await asyncio.wait_for(reader.read(), options['timeout'])
+                    writer.close()
+                    status_line = response.split(b'\r\n', 1)[0].split()
+                    if len(status_line) < 2 or status_line[1] != b'200':
+                        errors.append(status_line[1:2] or [b'empty'])
+                        return
+                    latencies.append(time.perf_counter() - started)
+                except (OSError, asyncio.TimeoutError) as e:
+                    errors.append(type(e).__name__)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(fetch() for _ in range(options['requests'])))
+        return time.perf_counter() - started, latencies, errors
+
+    def _report(self, label, result):
+        elapsed, latencies, errors = result
+        if not latencies:
+            self.stdout.write(self.style.ERROR(f'{label}: no successful requests ({len(errors)} errors)'))
+            return
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+        self.stdout.write(
+            f'{label}: {len(latencies) / elapsed:.1f} req/s, '
+            f'p50 {statistics.median(latencies) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms, '
+            f'{len(errors)} errors in {elapsed:.2f}s'
+        )
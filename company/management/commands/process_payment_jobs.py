@@ -0,0 +1,77 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from company.models import PaymentJob
+from company.payment_providers import get_payment_provider
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Drain the payment job queue, charging each payment through the provider'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Jobs claimed per round')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep polling for new jobs instead of exiting once the queue is empty'
+        )
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds between polls with --loop')
+        parser.add_argument(
+            '--visibility-timeout', type=float, default=15.0,
+            help='Minutes after which a processing job is assumed abandoned and claimed again'
+        )
+
+    def handle(self, *args, **options):
+        provider = get_payment_provider()
+        succeeded = failed = 0
+
+        while True:
+            jobs = self._claim(options['batch_size'], timedelta(minutes=options['visibility_timeout']))
+            if not jobs:
+                if not options['loop']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            for job in jobs:
+                if self._run(job, provider):
+                    succeeded += 1
+                else:
+                    failed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Processed {succeeded + failed} payment jobs ({succeeded} succeeded, {failed} failed)')
+        )
+
+    def _claim(self, batch_size, visibility_timeout):
+        """Move a batch of queued jobs to processing, skipping rows other workers hold.
+
+        Jobs left processing for longer than the visibility timeout belong to
+        a worker that died mid-run and are claimed again; the idempotency key
+        keeps the retried charge from being taken twice."""
+        now = timezone.now()
+        with transaction.atomic():
+            jobs = list(
+                PaymentJob.objects.select_for_update(skip_locked=True, of=('self',))
+                .filter(Q(status='queued') | Q(status='processing', updated_at__lt=now - visibility_timeout))
+                .select_related('payment__subscription__company', 'payment__subscription__plan')
+                .order_by('created_at')[:batch_size]
+            )
+            PaymentJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status='processing', attempts=F('attempts') + 1, updated_at=now
+            )
+        # Match the claimed rows, whose attempts guard the final status write
+        for job in jobs:
+            job.status, job.attempts = 'processing', job.attempts + 1
+        return jobs
+
+    def _run(self, job, provider):
+        if job.run(provider):
+            return True
+        logger.error(f"Payment job {job.pk} failed: {job.last_error}")
+        return False
@@ -0,0 +1,108 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from company.models import Payment, PaymentJob
+from company.payment_providers import get_payment_provider
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Process pending payments in batches across a bounded thread pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent provider calls')
+        parser.add_argument('--batch-size', type=int, default=200, help='Payments claimed per round')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many payments')
+
+    def handle(self, *args, **options):
+        # One provider client shared by every worker thread
+        provider = get_payment_provider()
+        limit = options['limit']
+        processed = failed = 0
+        started = time.perf_counter()
+
+        # Each worker thread opens its own connection; closed once the pool is done
+        worker_connections = []
+        try:
+            with ThreadPoolExecutor(
+                max_workers=options['workers'],
+                thread_name_prefix='payments',
+                initializer=self._share_connection,
+                initargs=(worker_connections,)
+            ) as pool:
+                while limit is None or processed < limit:
+                    batch_size = options['batch_size']
+                    if limit is not None:
+                        batch_size = min(batch_size, limit - processed)
+                    jobs = self._claim(batch_size)
+                    if not jobs:
+                        break
+                    for succeeded in pool.map(lambda job: self._run(job, provider), jobs):
+                        processed += 1
+                        if not succeeded:
+                            failed += 1
+        finally:
+            for worker_connection in worker_connections:
+                worker_connection.close()
+                worker_connection.dec_thread_sharing()
+
+        elapsed = time.perf_counter() - started
+        rate = processed / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Processed {processed} payments in {elapsed:.2f}s ({rate:.1f}/s), {failed} failed'
+            )
+        )
+
+    def _share_connection(self, worker_connections):
+        """Pool initializer letting the main thread close this worker's connection"""
+        worker_connection = connections[DEFAULT_DB_ALIAS]
+        worker_connection.inc_thread_sharing()
+        worker_connections.append(worker_connection)
+
+    def _claim(self, batch_size):
+        """Lock pending payments nobody else holds and open a processing job for each"""
+        has_job = PaymentJob.objects.filter(
+            payment=OuterRef('pk'),
+            status__in=['queued', 'processing', 'succeeded']
+        )
+        # Earlier jobs are failed ones, whose keys a retry must not reuse
+        previous_jobs = (
+            PaymentJob.objects.filter(payment=OuterRef('pk'))
+            .values('payment').annotate(count=Count('pk')).values('count')
+        )
+        with transaction.atomic():
+            payments = list(
+                Payment.objects.select_for_update(skip_locked=True, of=('self',))
+                .filter(status='pending')
+                .filter(~Exists(has_job))
+                .annotate(previous_jobs=Coalesce(Subquery(previous_jobs), 0))
+                .select_related('subscription__company', 'subscription__plan')
+                .order_by('payment_date', 'id')[:batch_size]
+            )
+            return PaymentJob.objects.bulk_create([
+                PaymentJob(
+                    payment=payment,
+                    idempotency_key=self._idempotency_key(payment),
+                    status='processing',
+                    attempts=1
+                )
+                for payment in payments
+            ])
+
+    def _idempotency_key(self, payment):
+        """The API's default key on the first attempt, numbered on each retry"""
+        if not payment.previous_jobs:
+            return f"payment-{payment.pk}"
+        return f"payment-{payment.pk}-{payment.previous_jobs + 1}"
+
+    def _run(self, job, provider):
+        if job.run(provider):
+            return True
+        logger.error(f"Payment {job.payment_id} failed: {job.last_error}")
+        return False
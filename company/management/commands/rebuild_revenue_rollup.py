@@ -0,0 +1,51 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from company.analytics import monthly_value
+from company.models import Payment, RevenueRollup, Subscription
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily revenue rollup from payments and subscriptions'
+
+    def handle(self, *args, **options):
+        rows = defaultdict(lambda: defaultdict(int))
+
+        payments = Payment.objects.filter(status='completed').order_by().values(
+            'subscription__plan_id', 'subscription__plan__billing_cycle',
+            day=TruncDate('payment_date')
+        ).annotate(revenue=Sum('amount'))
+        for row in payments:
+            key = (row['day'], row['subscription__plan_id'], row['subscription__plan__billing_cycle'])
+            rows[key]['revenue'] += row['revenue']
+
+        # Every subscription counts as new on its start day. Renewals cannot
+        # be told apart after the fact, and churn uses the last update day
+        started = Subscription.objects.order_by().values(
+            'plan_id', 'plan__billing_cycle', day=TruncDate('start_date')
+        ).annotate(total=Count('id'), cost=Sum('cost_at_signup'))
+        for row in started:
+            key = (row['day'], row['plan_id'], row['plan__billing_cycle'])
+            rows[key]['new_subscriptions'] += row['total']
+            rows[key]['mrr_change'] += monthly_value(row['cost'], row['plan__billing_cycle'])
+
+        ended = Subscription.objects.exclude(status='active').order_by().values(
+            'plan_id', 'plan__billing_cycle', day=TruncDate('updated_at')
+        ).annotate(total=Count('id'), cost=Sum('cost_at_signup'))
+        for row in ended:
+            key = (row['day'], row['plan_id'], row['plan__billing_cycle'])
+            rows[key]['churned_subscriptions'] += row['total']
+            rows[key]['mrr_change'] -= monthly_value(row['cost'], row['plan__billing_cycle'])
+
+        with transaction.atomic():
+            RevenueRollup.objects.all().delete()
+            RevenueRollup.objects.bulk_create([
+                RevenueRollup(day=day, plan_id=plan_id, billing_cycle=billing_cycle, **values)
+                for (day, plan_id, billing_cycle), values in rows.items()
+            ], batch_size=1000)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {len(rows)} revenue rollup rows')
+        )
@@ -1,23 +1,90 @@
+from itertools import islice
+
+from django.core import mail
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from company.models import Subscription
+from company.models import Subscription, NotificationLog
+from company.notifications import (
+    SubscriptionNotificationManager, SlackDeliveryEngine, get_admin_emails_by_company
+)
 
 class Command(BaseCommand):
     help = 'Send notifications for expiring subscriptions'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Subscriptions notified before their ledger rows are written'
+        )
+
     def handle(self, *args, **options):
-        today = timezone.now()
-        expiring_subscriptions = Subscription.objects.filter(
-            status='active',
-            end_date__gt=today,
-            end_date__lte=today + timezone.timedelta(days=7)
+        # Anti-join against the ledger so only outstanding channels are sent
+        expiring_subscriptions = (
+            Subscription.objects.expiring_soon()
+            .pending_notification()
+            .select_related('company', 'plan')
+            # Walk the partial end_date index instead of the default -start_date order
+            .order_by('end_date')
         )
-        
+
+        # One grouped query for the admins of every affected company
+        admin_emails = get_admin_emails_by_company(
+            expiring_subscriptions.values('company_id')
+        )
+
         notification_count = 0
-        for subscription in expiring_subscriptions:
-            if subscription.notify_expiring_soon():
-                notification_count += 1
-                
+        subscriptions = expiring_subscriptions.iterator(chunk_size=options['chunk_size'])
+        # Reuse a single SMTP connection for the whole run, while Slack
+        # posts fan out over the engine's worker pool
+        with mail.get_connection() as connection, SlackDeliveryEngine() as slack:
+            while chunk := list(islice(subscriptions, options['chunk_size'])):
+                pending = []
+                for subscription in chunk:
+                    if not subscription.is_expiring_soon:
+                        continue
+                    manager = SubscriptionNotificationManager(
+                        subscription,
+                        admin_emails=admin_emails.get(subscription.company_id, []),
+                        connection=connection
+                    )
+                    email_sent = False
+                    if not subscription.email_notified:
+                        email_sent = manager.send_email_notification()
+                    slack_future = None
+                    if not subscription.slack_notified:
+                        slack_future = manager.queue_slack_notification(slack)
+                    pending.append((subscription, email_sent, slack_future))
+
+                # Record each chunk as soon as it is delivered, so a crash
+                # later in the run does not resend it
+                notification_count += self._record(pending)
+
         self.stdout.write(
             self.style.SUCCESS(f'Sent {notification_count} expiry notifications')
-        )
\ No newline at end of file
+        )
+
+    def _record(self, pending):
+        """Write ledger rows for the delivered channels; returns subscriptions notified"""
+        sent_logs = []
+        notified = 0
+        for subscription, email_sent, slack_future in pending:
+            slack_sent = slack_future.result() if slack_future else False
+            threshold_days = subscription.company.notification_days_before
+            if email_sent:
+                sent_logs.append(NotificationLog(
+                    subscription=subscription,
+                    channel=NotificationLog.CHANNEL_EMAIL,
+                    threshold_days=threshold_days
+                ))
+            if slack_sent:
+                sent_logs.append(NotificationLog(
+                    subscription=subscription,
+                    channel=NotificationLog.CHANNEL_SLACK,
+                    threshold_days=threshold_days
+                ))
+            if email_sent or slack_sent:
+                notified += 1
+
+        NotificationLog.objects.bulk_create(
+            sent_logs, batch_size=1000, ignore_conflicts=True
+        )
+        return notified
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0004_alter_subscription_plan"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="subscription",
+            index=models.Index(
+                condition=models.Q(("status", "active")),
+                fields=["end_date"],
+                name="subscriptions_active_end_idx",
+            ),
+        ),
+    ]
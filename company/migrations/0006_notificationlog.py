@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0005_subscription_active_end_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationLog",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "channel",
+                    models.CharField(
+                        choices=[("email", "Email"), ("slack", "Slack")], max_length=10
+                    ),
+                ),
+                ("threshold_days", models.PositiveSmallIntegerField()),
+                ("sent_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "subscription",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="notification_logs",
+                        to="company.subscription",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "notification_logs",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("subscription", "channel", "threshold_days"),
+                        name="one_notification_per_channel_threshold",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_active_subscription(apps, schema_editor):
+    Company = apps.get_model("company", "Company")
+    Subscription = apps.get_model("company", "Subscription")
+    active = Subscription.objects.filter(
+        company=models.OuterRef("pk"), status="active"
+    ).values("id")[:1]
+    Company.objects.update(active_subscription=models.Subquery(active))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0006_notificationlog"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="active_subscription",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="company.subscription",
+            ),
+        ),
+        migrations.RunPython(
+            populate_active_subscription, migrations.RunPython.noop
+        ),
+    ]
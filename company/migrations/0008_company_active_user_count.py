@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:25
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def populate_active_user_count(apps, schema_editor):
+    Company = apps.get_model("company", "Company")
+    User = apps.get_model("company", "User")
+    active_users = (
+        User.objects.filter(company=models.OuterRef("pk"), is_active=True)
+        .order_by()
+        .values("company")
+        .annotate(total=models.Count("id"))
+        .values("total")
+    )
+    Company.objects.update(
+        active_user_count=Coalesce(models.Subquery(active_users), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0007_company_active_subscription"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="active_user_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_active_user_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0008_company_active_user_count"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["payment_date", "id"], name="payments_payment_97aa56_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="subscription",
+            index=models.Index(
+                fields=["start_date", "id"], name="subscriptio_start_d_fd97f7_idx"
+            ),
+        ),
+    ]
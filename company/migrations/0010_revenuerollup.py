@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0009_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RevenueRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "billing_cycle",
+                    models.CharField(
+                        choices=[
+                            ("monthly", "Monthly"),
+                            ("quarterly", "Quarterly"),
+                            ("yearly", "Yearly"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("new_subscriptions", models.PositiveIntegerField(default=0)),
+                ("renewed_subscriptions", models.PositiveIntegerField(default=0)),
+                ("churned_subscriptions", models.PositiveIntegerField(default=0)),
+                (
+                    "mrr_change",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "plan",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="revenue_rollups",
+                        to="company.subscriptionplan",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "revenue_rollups",
+                "ordering": ["day"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "plan", "billing_cycle"),
+                        name="one_rollup_per_plan_cycle_day",
+                    )
+                ],
+            },
+        ),
+    ]
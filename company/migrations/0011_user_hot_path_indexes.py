@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("company", "0010_revenuerollup"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["company", "is_active"], name="users_company_active_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_active", True), ("is_staff", True)),
+                fields=["company", "email"],
+                name="users_active_staff_idx",
+            ),
+        ),
+        # Drop the single-column FK index once the composite covers it
+        migrations.AlterField(
+            model_name="user",
+            name="company",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="users",
+                to="company.company",
+            ),
+        ),
+    ]
@@ -1,12 +1,10 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 from datetime import timedelta
 from dateutil.relativedelta import relativedelta
 from django.core.exceptions import ValidationError
-import stripe
-
-from notes_api import settings 
 
 
 
@@ -27,32 +25,94 @@ class Company(models.Model):
     notify_slack = models.BooleanField(default=False)
     slack_webhook_url = models.URLField(null=True, blank = True)
     notification_days_before = models.PositiveIntegerField(default=7)
+    # Maintained by Subscription.save so reads need no subscriptions lookup
+    active_subscription = models.ForeignKey(
+        "Subscription", on_delete=models.SET_NULL, related_name="+",
+        null=True, blank=True, editable=False
+    )
+    # Active users, kept in step with F() updates so seat checks are O(1)
+    active_user_count = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         db_table = "companies"
         ordering = ["name"]
         verbose_name_plural = "Companies"
     
+    # Kept current by set-based updates; a full save from a possibly stale
+    # instance must not write them back
+    MAINTAINED_FIELDS = ('active_subscription', 'active_user_count')
+
     def __str__(self):
         return f"{self.name} ({self.status})"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.MAINTAINED_FIELDS
+            ]
+        super().save(*args, **kwargs)
     
     def suspend(self):
         """Suspend company and all its users"""
         self.status = "suspended"
         self.save()
         # Suspend all users under this company
-        self.users.update(is_active=False)
+        self.deactivate_users()
+
+    def deactivate_users(self):
+        """Deactivate every user and reset the seat counter"""
+        with transaction.atomic():
+            self.users.update(is_active=False, updated_at=timezone.now())
+            Company.objects.filter(pk=self.pk).update(active_user_count=0)
+        self.active_user_count = 0
+
+    def reactivate_users(self):
+        """Reactivate every user and recount the seats in use"""
+        with transaction.atomic():
+            self.users.update(is_active=True, updated_at=timezone.now())
+            Company.refresh_active_user_counts(Company.objects.filter(pk=self.pk))
+        self.refresh_from_db(fields=['active_user_count'])
+
+    @staticmethod
+    def refresh_active_user_counts(companies):
+        """Recompute active_user_count for a queryset of companies in one UPDATE"""
+        active_users = User.objects.filter(
+            company=models.OuterRef('pk'), is_active=True
+        ).order_by().values('company').annotate(
+            total=models.Count('id')
+        ).values('total')
+        return companies.update(
+            active_user_count=Coalesce(models.Subquery(active_users), 0)
+        )
+
+    def claim_seat(self):
+        """Atomically take one active-user seat, enforcing per-user plan limits"""
+        seats = Company.objects.filter(pk=self.pk)
+        active_sub = self.active_subscription
+        limited = (
+            active_sub and active_sub.load_plan().pricing_model == 'per_user' and active_sub.max_users
+        )
+        if limited:
+            seats = seats.filter(active_user_count__lt=active_sub.max_users)
+        if not seats.update(active_user_count=models.F('active_user_count') + 1):
+            raise ValidationError(
+                f"Cannot add user. Company has reached the maximum limit of {active_sub.max_users} users."
+            )
+        self.active_user_count += 1
+
+    @staticmethod
+    def release_seat(company_id):
+        """Give back one active-user seat"""
+        Company.objects.filter(pk=company_id, active_user_count__gt=0).update(
+            active_user_count=models.F('active_user_count') - 1
+        )
     
     def activate(self):
         """Activate company (users need to be activated separately if needed)"""
         self.status = "active"
         self.save()
     
-    @property
-    def active_subscription(self):
-        """Get the company's active subscription"""
-        return self.subscriptions.filter(status='active').first()
-    
     @property
     def can_add_users(self):
         """Check if company can add more users based on subscription"""
@@ -60,13 +120,20 @@ class Company(models.Model):
         if not active_sub:
             return False
         
-        if active_sub.plan.pricing_model == 'per_user' and active_sub.max_users:
-            current_user_count = self.users.filter(is_active=True).count()
-            return current_user_count < active_sub.max_users
+        if active_sub.load_plan().pricing_model == 'per_user' and active_sub.max_users:
+            return self.active_user_count < active_sub.max_users
         
         return True
 
 
+# Length of one billing period, by SubscriptionPlan.billing_cycle
+BILLING_PERIODS = {
+    'monthly': relativedelta(months=1),
+    'quarterly': relativedelta(months=3),
+    'yearly': relativedelta(years=1),
+}
+
+
 class SubscriptionPlan(models.Model):
     BILLING_CYCLE_CHOICES = [
         ('monthly', 'Monthly'),
@@ -102,6 +169,144 @@ class SubscriptionPlan(models.Model):
             raise ValidationError("Per-user plans must have a user limit specified")
 
 
+class AddDays(models.Func):
+    """Database-side `datetime + days`, where days may be a column"""
+    output_field = models.DateTimeField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template="(%(expressions)s * INTERVAL '1 day')",
+            arg_joiner=" + ",
+            **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template="DATE_ADD(%(expressions)s DAY)",
+            arg_joiner=", INTERVAL ",
+            **extra_context
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Keep the same text layout Django stores datetimes in, so the
+        # result compares correctly against datetime columns
+        datetime_sql, datetime_params = compiler.compile(self.source_expressions[0])
+        days_sql, days_params = compiler.compile(self.source_expressions[1])
+        sql = f"strftime('%%Y-%%m-%%d %%H:%%M:%%f', {datetime_sql}, '+' || ({days_sql}) || ' days')"
+        return sql, (*datetime_params, *days_params)
+
+
+class SubscriptionQuerySet(models.QuerySet):
+    def expiring_soon(self, now=None):
+        """Active subscriptions inside their company's notification window"""
+        now = now or timezone.now()
+        now_value = models.Value(now, output_field=models.DateTimeField())
+        # The widest window is one constant for the whole query, so together
+        # with end_date > now it bounds a range scan of the partial index;
+        # the per-company window below is evaluated per row
+        widest_window = models.Subquery(
+            Company.objects.order_by('-notification_days_before').values('notification_days_before')[:1]
+        )
+        return self.filter(
+            status='active',
+            end_date__gt=now,
+            end_date__lte=AddDays(now_value, widest_window)
+        ).alias(
+            notification_window_end=AddDays(
+                now_value,
+                models.F('company__notification_days_before')
+            )
+        ).filter(end_date__lte=models.F('notification_window_end'))
+
+    def bulk_renew(self, now=None):
+        """Expire these active subscriptions and start a new period for each, set-based.
+
+        Returns (renewed, reactivated_companies)."""
+        from .analytics import record_bulk_activation, record_bulk_deactivation
+
+        now = now or timezone.now()
+        with transaction.atomic():
+            current = list(
+                self.filter(status='active')
+                .select_related('plan')
+                .select_for_update(of=('self',))
+                .order_by('id')
+            )
+            if not current:
+                return 0, 0
+            company_ids = {subscription.company_id for subscription in current}
+
+            expiring = Subscription.objects.filter(pk__in=[subscription.pk for subscription in current])
+            record_bulk_deactivation(expiring, renewal=True)
+            expiring.update(status='expired', updated_at=now)
+
+            renewed = Subscription.objects.bulk_create([
+                Subscription(
+                    company_id=subscription.company_id,
+                    plan=subscription.plan,
+                    status='active',
+                    start_date=now,
+                    end_date=now + BILLING_PERIODS[subscription.plan.billing_cycle],
+                    max_users=subscription.max_users,
+                    cost_at_signup=subscription.plan.cost
+                )
+                for subscription in current
+            ], batch_size=1000)
+            # Found by company rather than by pk: not every backend returns
+            # primary keys from bulk_create. The expired rows are no longer
+            # active, so these are exactly the new ones
+            record_bulk_activation(
+                Subscription.objects.filter(company_id__in=company_ids, status='active', start_date=now),
+                renewal=True
+            )
+
+            companies = Company.objects.filter(pk__in=company_ids)
+            companies.update(
+                active_subscription=models.Subquery(
+                    Subscription.objects.filter(
+                        company=models.OuterRef('pk'), status='active'
+                    ).values('pk')[:1]
+                ),
+                updated_at=now
+            )
+            reactivated = companies.filter(status='suspended').update(status='active', updated_at=now)
+        return len(renewed), reactivated
+
+    def pending_notification(self):
+        """Annotate ledger state per channel and drop rows with nothing left to deliver.
+
+        A channel without a destination (no recipients, or Slack enabled
+        without a webhook) never gets a ledger row, so it is not pending."""
+        def already_sent(channel):
+            return models.Exists(NotificationLog.objects.filter(
+                subscription=models.OuterRef('pk'),
+                channel=channel,
+                threshold_days=models.OuterRef('company__notification_days_before')
+            ))
+
+        has_admin_email = models.Exists(User.objects.filter(
+            company=models.OuterRef('company_id'),
+            is_active=True,
+            is_staff=True
+        ).exclude(email=''))
+        has_email_recipient = has_admin_email | (
+            models.Q(company__notification_email__isnull=False) & ~models.Q(company__notification_email='')
+        )
+        has_slack_webhook = (
+            models.Q(company__notify_slack=True, company__slack_webhook_url__isnull=False) &
+            ~models.Q(company__slack_webhook_url='')
+        )
+        return self.annotate(
+            email_notified=already_sent(NotificationLog.CHANNEL_EMAIL),
+            slack_notified=already_sent(NotificationLog.CHANNEL_SLACK)
+        ).filter(
+            (models.Q(email_notified=False) & has_email_recipient) |
+            (models.Q(slack_notified=False) & has_slack_webhook)
+        )
+
+
 class Subscription(models.Model):
     STATUS_CHOICES = [
         ('active', 'Active'),
@@ -122,10 +327,25 @@ class Subscription(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = SubscriptionQuerySet.as_manager()
+
+    # Status as last loaded or saved, for the revenue rollup
+    _loaded_status = None
     
     class Meta:
         db_table = "subscriptions"
         ordering = ["-start_date"]
+        indexes = [
+            # Keyset pagination order
+            models.Index(fields=["start_date", "id"]),
+            # Range scan over active rows for the expiry window
+            models.Index(
+                fields=["end_date"],
+                condition=models.Q(status="active"),
+                name="subscriptions_active_end_idx"
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["company"],
@@ -136,16 +356,26 @@ class Subscription(models.Model):
     
     def __str__(self):
         return f"Subscription {self.id} - {self.company.name} ({self.plan.name})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
     
-    def save(self, *args, **kwargs):
+    def load_plan(self):
+        """The plan, served from the plan cache unless already loaded"""
+        if self.plan_id and not Subscription.plan.is_cached(self):
+            from .plan_cache import get_plan
+            self.plan = get_plan(self.plan_id)
+        return self.plan
+
+    def save(self, *args, renewal=False, **kwargs):
         """Auto-calculate end_date and snapshot plan details"""
+        self.load_plan()
         if not self.end_date and self.start_date and self.plan:
-            if self.plan.billing_cycle == "monthly":
-                self.end_date = self.start_date + relativedelta(months=1)
-            elif self.plan.billing_cycle == "quarterly":
-                self.end_date = self.start_date + relativedelta(months=3)
-            elif self.plan.billing_cycle == "yearly":
-                self.end_date = self.start_date + relativedelta(years=1)
+            if self.plan.billing_cycle in BILLING_PERIODS:
+                self.end_date = self.start_date + BILLING_PERIODS[self.plan.billing_cycle]
         
         # Snapshot important values from plan
         if self.plan and not self.max_users:
@@ -153,12 +383,36 @@ class Subscription(models.Model):
         if self.plan and not self.cost_at_signup:
             self.cost_at_signup = self.plan.cost
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._sync_company_active_subscription()
+            from .analytics import record_subscription_change
+            record_subscription_change(self, self._loaded_status, renewal=renewal)
+        self._loaded_status = self.status
         
         # If subscription becomes inactive, suspend company users
         if self.status in ['expired', 'suspended']:
-            self.company.users.update(is_active=False)
-    
+            self.company.deactivate_users()
+    
+    def _sync_company_active_subscription(self):
+        """Point the company at this subscription while it is active"""
+        now = timezone.now()
+        if self.status == 'active':
+            Company.objects.filter(pk=self.company_id).exclude(
+                active_subscription_id=self.pk
+            ).update(active_subscription=self.pk, updated_at=now)
+            pointer = self
+        else:
+            Company.objects.filter(
+                pk=self.company_id, active_subscription_id=self.pk
+            ).update(active_subscription=None, updated_at=now)
+            pointer = None
+
+        if Subscription.company.is_cached(self):
+            company = self.company
+            if pointer is not None or company.active_subscription_id == self.pk:
+                company.active_subscription = pointer
+
     def is_active(self):
         """Check if subscription is currently active"""
         return (
@@ -180,19 +434,17 @@ class Subscription(models.Model):
 
     def renew(self):
         """Create a new subscription based on current one"""
+        self.load_plan()
         # First expire the current subscription
         self.status = 'expired'
-        self.save()
+        self.save(renewal=True)
 
         # Calculate new dates
         start_date = timezone.now()
-        if self.plan.billing_cycle == 'monthly':
-            end_date = start_date + relativedelta(months=1)
-        else:
-            end_date = start_date + relativedelta(years=1)
+        end_date = start_date + BILLING_PERIODS[self.plan.billing_cycle]
 
         # Create new subscription
-        new_subscription = Subscription.objects.create(
+        new_subscription = Subscription(
             company=self.company,
             plan=self.plan,
             status='active',
@@ -201,6 +453,7 @@ class Subscription(models.Model):
             max_users=self.max_users,
             cost_at_signup=self.plan.cost
         )
+        new_subscription.save(renewal=True)
 
         # Reactivate company if suspended
         if self.company.status == 'suspended':
@@ -209,23 +462,25 @@ class Subscription(models.Model):
         return new_subscription
 
     def extend_subscription_after_payment(self,payment):
+        self.load_plan()
 
         if payment.status != "completed":
             raise ValidationError("Cannot extend subscription with incomplete payment.")    
         
         if payment.status == "completed":
-            if self.plan.billing_cycle == "monthly":
-                self.end_date += relativedelta(months=1)
-            elif self.plan.billing_cycle == "quarterly":
-                self.end_date += relativedelta(months=3)
-            elif self.plan.billing_cycle == "yearly":
-                self.end_date += relativedelta(years=1)
-            
-            self.status = "active"
-            self.save()
+            with transaction.atomic():
+                # Reload under a row lock: other payments for this subscription
+                # may have extended it since this instance was loaded
+                current = Subscription.objects.select_for_update().only('end_date', 'status').get(pk=self.pk)
+                self.end_date, self._loaded_status = current.end_date, current.status
+                if self.plan.billing_cycle in BILLING_PERIODS:
+                    self.end_date += BILLING_PERIODS[self.plan.billing_cycle]
+
+                self.status = "active"
+                self.save()
             
             if self.company.status == "active":
-                self.company.users.update(is_active=True)   
+                self.company.reactivate_users()
 
 
     @property
@@ -233,56 +488,201 @@ class Subscription(models.Model):
         if not self.end_date:
             return False
         
+        window = timedelta(days=self.company.notification_days_before)
         return (
             self.status == 'active' and
-            (self.end_date - timezone.now()).days <= 7
+            self.end_date - timezone.now() <= window
         )
 
 
-    def notify_expiring_soon(self):
+    def notify_expiring_soon(self, admin_emails=None, connection=None):
         """Send notifications if subscription is expiring soon"""
         if self.is_expiring_soon:
             from .notifications import SubscriptionNotificationManager
-            notification_manager = SubscriptionNotificationManager(self)
+            notification_manager = SubscriptionNotificationManager(
+                self, admin_emails=admin_emails, connection=connection
+            )
             email_sent = notification_manager.send_email_notification()
             slack_sent = notification_manager.send_slack_notification()
             return email_sent or slack_sent
         return False
 
 
+class NotificationLog(models.Model):
+    """Ledger of expiry notifications already sent, one row per channel"""
+    CHANNEL_EMAIL = 'email'
+    CHANNEL_SLACK = 'slack'
+    CHANNEL_CHOICES = [
+        (CHANNEL_EMAIL, 'Email'),
+        (CHANNEL_SLACK, 'Slack'),
+    ]
+
+    # Covered by the unique constraint's index, which leads with subscription
+    subscription = models.ForeignKey(
+        "Subscription", on_delete=models.CASCADE, related_name="notification_logs", db_index=False
+    )
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    # Company window (notification_days_before) the notice was sent for
+    threshold_days = models.PositiveSmallIntegerField()
+    sent_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "notification_logs"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["subscription", "channel", "threshold_days"],
+                name="one_notification_per_channel_threshold"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.channel} notice for subscription {self.subscription_id} ({self.threshold_days} days)"
+
+
+class RevenueRollup(models.Model):
+    """Daily revenue and subscription movements per plan, maintained incrementally"""
+    day = models.DateField()
+    # Covered by the unique constraint's index
+    plan = models.ForeignKey(
+        "SubscriptionPlan", on_delete=models.CASCADE, related_name="revenue_rollups", db_index=False
+    )
+    billing_cycle = models.CharField(max_length=20, choices=SubscriptionPlan.BILLING_CYCLE_CHOICES)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    new_subscriptions = models.PositiveIntegerField(default=0)
+    renewed_subscriptions = models.PositiveIntegerField(default=0)
+    churned_subscriptions = models.PositiveIntegerField(default=0)
+    # Net change in monthly recurring revenue; MRR on a day is the running sum
+    mrr_change = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "revenue_rollups"
+        ordering = ["day"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "plan", "billing_cycle"],
+                name="one_rollup_per_plan_cycle_day"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.day} - plan {self.plan_id} ({self.billing_cycle})"
+
+
 class User(AbstractUser):
-    company = models.ForeignKey("company.Company", on_delete=models.CASCADE, related_name="users")
+    # Indexed through the (company, is_active) composite below
+    company = models.ForeignKey(
+        "company.Company", on_delete=models.CASCADE, related_name="users", db_index=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # (company_id, is_active) as last loaded or saved, for seat accounting
+    _seat_state = (None, False)
+
     class Meta:
         db_table = "users"
         ordering = ["username"]
+        indexes = [
+            # Seat counting and bulk (de)activation per company
+            models.Index(fields=["company", "is_active"], name="users_company_active_idx"),
+            # Admin email lookup: the partial index holds only active staff, so
+            # the scan skips everyone else, though rows are still read from the table
+            models.Index(
+                fields=["company", "email"],
+                condition=models.Q(is_active=True, is_staff=True),
+                name="users_active_staff_idx"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'company_id' in field_names and 'is_active' in field_names:
+            instance._seat_state = (instance.company_id, instance.is_active)
+        else:
+            # Deferred; read from the database if a save needs it
+            instance._seat_state = None
+        return instance
+
+    def _loaded_seat_state(self):
+        """(company_id, is_active) as last loaded or saved"""
+        if self._seat_state is None:
+            self._seat_state = User.objects.filter(pk=self.pk).values_list('company_id', 'is_active').get()
+        return self._seat_state
     
     def clean(self):
         """Validate user creation against company subscription limits"""
-        if self.company_id:
-            company = Company.objects.get(id=self.company_id)
-            if not company.can_add_users:
-                active_sub = company.active_subscription
-                if active_sub and active_sub.plan.pricing_model == 'per_user':
-                    raise ValidationError(
-                        f"Cannot add user. Company has reached the maximum limit of {active_sub.max_users} users."
-                    )
-                else:
-                    raise ValidationError("Cannot add user. Company has no active subscription.")
-    
+        if self.company_id and self._needs_limit_check():
+            self._validate_company(self._load_company())
+
     def save(self, *args, **kwargs):
-        # Validate before saving
-        self.clean()
-        
-        # Ensure user is inactive if company subscription is not active
-        if self.company:
-            active_sub = self.company.active_subscription
+        old_company_id, was_active = self._loaded_seat_state()
+        unchanged = (
+            not self._state.adding and
+            old_company_id == self.company_id and
+            was_active == self.is_active
+        )
+        if unchanged or not self.company_id:
+            # Nothing that affects seats or limits changed, e.g. profile edits
+            super().save(*args, **kwargs)
+            return
+
+        if self._needs_limit_check():
+            # Load company, active subscription and plan in one query
+            company = self._load_company()
+            self._validate_company(company)
+
+            # Ensure user is inactive if company subscription is not active
+            active_sub = company.active_subscription
             if not active_sub or not active_sub.is_active():
                 self.is_active = False
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            self._update_seats()
+            super().save(*args, **kwargs)
+        self._seat_state = (self.company_id, self.is_active)
+
+    def _needs_limit_check(self):
+        """New users and users taking a seat must fit the subscription"""
+        old_company_id, was_active = self._loaded_seat_state()
+        return self._state.adding or (
+            self.is_active and (not was_active or old_company_id != self.company_id)
+        )
+
+    def _load_company(self):
+        company = Company.objects.select_related('active_subscription__plan').get(pk=self.company_id)
+        self.company = company
+        return company
+
+    def _validate_company(self, company):
+        if not company.can_add_users:
+            active_sub = company.active_subscription
+            if active_sub and active_sub.load_plan().pricing_model == 'per_user':
+                raise ValidationError(
+                    f"Cannot add user. Company has reached the maximum limit of {active_sub.max_users} users."
+                )
+            else:
+                raise ValidationError("Cannot add user. Company has no active subscription.")
+
+    def delete(self, *args, **kwargs):
+        company_id, was_active = self._loaded_seat_state()
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            if was_active:
+                Company.release_seat(company_id)
+        self._seat_state = (None, False)
+        return result
+
+    def _update_seats(self):
+        """Move the company seat counters to match this user's new state"""
+        old_company_id, was_active = self._loaded_seat_state()
+        moved = old_company_id != self.company_id
+        if self.is_active and (not was_active or moved):
+            self.company.claim_seat()
+        if was_active and (not self.is_active or moved):
+            Company.release_seat(old_company_id)
 
 
 class Payment(models.Model):
@@ -317,10 +717,28 @@ class Payment(models.Model):
         indexes = [
             models.Index(fields=['subscription', 'status']),
             models.Index(fields=['status','payment_date']),
+            # Keyset pagination order
+            models.Index(fields=['payment_date', 'id']),
         ]
     
+    # Status as last loaded or saved, for the revenue rollup
+    _loaded_status = None
+
     def __str__(self):
         return f"Payment {self.id} - {self.subscription.company.name} - ${self.amount}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            from .analytics import record_payment_change
+            record_payment_change(self, self._loaded_status)
+        self._loaded_status = self.status
     
 
  
@@ -332,25 +750,20 @@ class Payment(models.Model):
         if self.amount <= 0:
             raise ValidationError("Payment amount must be positive.") 
 
-    def process_payment(self):
+    def process_payment(self, provider=None, idempotency_key=None):
+
+        from .payment_providers import PaymentProviderError, get_payment_provider
 
         try:
             self.validate()
 
             if self.method == "credit_card":
 
-                stripe.api_key = settings.STRIPE_SECRET_KEY
-
-                payment_intent = stripe.PaymentIntent.create(
-                    amount=int(self.amount * 100),  # Amount in cents
-                    currency="usd",
-                    payment_method_types=["card"],
-                    description=f"Payment for {self.subscription.company.name} subscription"
-                )
-                
+                provider = provider or get_payment_provider()
+                reference = provider.charge(self, idempotency_key=idempotency_key)
 
                 self.status = 'completed'   
-                self.notes = f"Payment processed via Stripe. Payment Intent ID: {payment_intent.id}"   
+                self.notes = f"Payment processed via {provider.name}. Payment Intent ID: {reference}"   
 
             elif self.method == "bank_transfer":
                 pass  # Implement bank transfer logic   
@@ -364,7 +777,7 @@ class Payment(models.Model):
             if self.status == "completed":
                 self.subscription.extend_subscription_after_payment(self)
 
-        except stripe.error.StripeError as e:
+        except PaymentProviderError as e:
                 self.status = 'failed'
                 self.notes = f"Payment failed: {str(e)}"
                 self.save()
@@ -374,4 +787,60 @@ class Payment(models.Model):
                 self.status = 'failed'
                 self.notes = f"System error: {str(e)}"
                 self.save()
-                raise    
\ No newline at end of file
+                raise
+
+
+class PaymentJob(models.Model):
+    """Queued request to process a payment, deduplicated by idempotency key"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('processing', 'Processing'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    payment = models.ForeignKey("Payment", on_delete=models.CASCADE, related_name="jobs")
+    idempotency_key = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "payment_jobs"
+        ordering = ["created_at"]
+        indexes = [
+            # Worker drains queued jobs oldest first
+            models.Index(fields=["status", "created_at"]),
+        ]
+        constraints = [
+            # At most one job in flight per payment, whatever the key
+            models.UniqueConstraint(
+                fields=["payment"],
+                condition=models.Q(status__in=["queued", "processing"]),
+                name="one_open_job_per_payment"
+            )
+        ]
+
+    def __str__(self):
+        return f"PaymentJob {self.id} - payment {self.payment_id} ({self.status})"
+
+    def run(self, provider):
+        """Process the payment through the provider and record the outcome"""
+        try:
+            # A reclaimed job may find its payment already completed by the
+            # worker that died; charging and extending again would double up
+            if self.payment.status != 'completed':
+                self.payment.process_payment(provider=provider, idempotency_key=self.idempotency_key)
+        except Exception as e:
+            self.status, self.last_error = 'failed', str(e)
+        else:
+            self.status, self.last_error = 'succeeded', None
+        # Guarded by the claim: once the visibility timeout hands the job
+        # to another worker, that worker's outcome is the one recorded
+        PaymentJob.objects.filter(pk=self.pk, status='processing', attempts=self.attempts).update(
+            status=self.status, last_error=self.last_error, updated_at=timezone.now()
+        )
+        return self.status == 'succeeded'
@@ -2,17 +2,106 @@ from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
 import requests
+from requests.adapters import HTTPAdapter
 import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from django.utils import timezone
 from django.core.management.base import BaseCommand
 
 
 logger = logging.getLogger(__name__)
 
+def get_admin_emails_by_company(company_ids):
+    """Map company id to active staff emails, in a single query"""
+    from .models import User
+
+    admin_emails = defaultdict(list)
+    rows = User.objects.filter(
+        company_id__in=company_ids,
+        is_active=True,
+        is_staff=True
+    ).exclude(email='').values_list('company_id', 'email')
+    for company_id, email in rows:
+        admin_emails[company_id].append(email)
+    return admin_emails
+
+
+class SlackDeliveryEngine:
+    """Deliver Slack webhook posts over a pooled keep-alive session"""
+
+    def __init__(self, max_workers=None, timeout=None, webhook_override=None):
+        config = getattr(settings, 'NOTIFICATION_SETTINGS', {})
+        self.max_workers = max_workers or config.get('SLACK_MAX_WORKERS', 8)
+        self.timeout = timeout or config.get('SLACK_TIMEOUT', 5)
+        # Send every post to one URL instead, e.g. a local stub server
+        self.webhook_override = webhook_override or config.get('SLACK_WEBHOOK_OVERRIDE')
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.max_workers,
+            pool_maxsize=self.max_workers
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def post(self, webhook_url, message, label=None):
+        """Post one message and report whether it was delivered"""
+        try:
+            response = self.session.post(
+                self.webhook_override or webhook_url,
+                json=message,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            logger.error(f"Slack notification failed for {label or webhook_url}: {str(e)}")
+            return False
+
+    def submit(self, webhook_url, message, label=None):
+        """Queue a post on the worker pool and return its future"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='slack-delivery'
+            )
+        return self._executor.submit(self.post, webhook_url, message, label)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.session.close()
+
+
+_default_slack_engine = None
+
+
+def get_slack_engine():
+    """Shared engine for one-off notifications outside bulk runs"""
+    global _default_slack_engine
+    if _default_slack_engine is None:
+        _default_slack_engine = SlackDeliveryEngine()
+    return _default_slack_engine
+
+
 class SubscriptionNotificationManager:
-    def __init__(self, subscription):
+    def __init__(self, subscription, admin_emails=None, connection=None):
         self.subscription = subscription
         self.company = subscription.company
+        # Preloaded admin emails and a shared SMTP connection let bulk
+        # runs skip per-subscription lookups and setup
+        self.admin_emails = admin_emails
+        self.connection = connection
+        self._context = None
         
     def send_email_notification(self):
         """Send email notifications to company admins"""
@@ -28,7 +117,8 @@ class SubscriptionNotificationManager:
                     message=render_to_string('company/emails/subscription_expiring.txt', context),
                     html_message=render_to_string('company/emails/subscription_expiring.html', context),
                     from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=recipients
+                    recipient_list=recipients,
+                    connection=self.connection
                 )
                 logger.info(f"Sent expiry notification to {self.company.name}")
                 return True
@@ -36,20 +126,38 @@ class SubscriptionNotificationManager:
                 logger.error(f"Failed to send email to {self.company.name}: {str(e)}")
                 return False
     
-    def send_slack_notification(self):
+    def send_slack_notification(self, engine=None):
         """Send Slack notification if company has enabled it"""
         if self.company.notify_slack and self.company.slack_webhook_url:
-            try:
-                context = self._get_notification_context()
-                slack_message = {
-                    "text": self._format_slack_message(context)
-                }
-                response = requests.post(self.company.slack_webhook_url, json=slack_message)
-                response.raise_for_status()
-                return True
-            except Exception as e:
-                logger.error(f"Slack notification failed for {self.company.name}: {str(e)}")
-                return False
+            engine = engine or get_slack_engine()
+            return engine.post(
+                self.company.slack_webhook_url,
+                self._get_slack_message(),
+                label=self.company.name
+            )
+
+    def queue_slack_notification(self, engine):
+        """Queue Slack notification on the engine's worker pool, if enabled"""
+        if self.company.notify_slack and self.company.slack_webhook_url:
+            return engine.submit(
+                self.company.slack_webhook_url,
+                self._get_slack_message(),
+                label=self.company.name
+            )
+        return None
+
+    def _get_slack_message(self):
+        context = self._get_notification_context()
+        return {
+            "text": self._format_slack_message(context)
+        }
+
+    def _format_slack_message(self, context):
+        return (
+            f"Subscription for *{context['company_name']}* ({context['plan_name']}) "
+            f"expires in {context['days_left']} days on {context['end_date']:%Y-%m-%d}. "
+            f"Renew: {context['renewal_url']}"
+        )
     
     def _get_notification_recipients(self):
         """Get company-specific notification recipients"""
@@ -60,23 +168,28 @@ class SubscriptionNotificationManager:
             recipients.add(self.company.notification_email)
         
         # Add active company admins
-        admin_emails = self.company.users.filter(
-            is_active=True,
-            is_staff=True
-        ).values_list('email', flat=True)
+        admin_emails = self.admin_emails
+        if admin_emails is None:
+            admin_emails = self.company.users.filter(
+                is_active=True,
+                is_staff=True
+            ).exclude(email='').values_list('email', flat=True)
         recipients.update(admin_emails)
         
         return list(recipients)
     
     def _get_notification_context(self):
         """Get context for notification templates"""
-        return {
-            'company_name': self.company.name,
-            'end_date': self.subscription.end_date,
-            'days_left': (self.subscription.end_date - timezone.now()).days,
-            'renewal_url': f"{settings.BASE_URL}/subscriptions/{self.subscription.id}/renew/",
-            'plan_name': self.subscription.plan.name
-        }
+        # Built once and shared by the email and Slack messages
+        if self._context is None:
+            self._context = {
+                'company_name': self.company.name,
+                'end_date': self.subscription.end_date,
+                'days_left': (self.subscription.end_date - timezone.now()).days,
+                'renewal_url': f"{settings.BASE_URL}/subscriptions/{self.subscription.id}/renew/",
+                'plan_name': self.subscription.plan.name
+            }
+        return self._context
     
 
 
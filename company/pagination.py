@@ -0,0 +1,123 @@
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination over an indexed, stable ordering.
+
+    The cursor holds every ordering column of the last row, not only the
+    first as in CursorPagination, and pages with a row comparison such as
+    (start_date, id) > (x, y). Rows sharing a start_date are then
+    skipped by the index instead of by OFFSET.
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self._after(current_position, reverse))
+
+        # Positions are unique, so the offset stays 0 for cursors built here
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is not None and cursor.position is not None:
+            try:
+                values = json.loads(cursor.position)
+            except ValueError:
+                values = None
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def _after(self, position, reverse):
+        """Rows strictly past `position` in the direction being read"""
+        values = json.loads(position)
+        condition = Q()
+        equal = {}
+        for order, value in zip(self.ordering, values):
+            attr = order.lstrip('-')
+            lookup = 'lt' if reverse != order.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{attr}__{lookup}': value})
+            equal[attr] = value
+        # A redundant bound on the leading column gives the index a range start
+        first = self.ordering[0]
+        lookup = 'lte' if reverse != first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{lookup}': values[0]}) & condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            attr = order.lstrip('-')
+            value = instance[attr] if isinstance(instance, dict) else getattr(instance, attr)
+            values.append(str(value))
+        return json.dumps(values, separators=(',', ':'))
+
+
+class CompanyPagination(KeysetPagination):
+    ordering = ('name',)
+
+
+class SubscriptionPagination(KeysetPagination):
+    ordering = ('start_date', 'id')
+
+
+class PaymentPagination(KeysetPagination):
+    ordering = ('payment_date', 'id')
+
+
+class UserPagination(KeysetPagination):
+    ordering = ('username',)
@@ -0,0 +1,25 @@
+import codecs
+from io import BytesIO
+
+import orjson
+from rest_framework.parsers import JSONParser
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser on orjson; bodies orjson rejects are re-parsed by the stdlib parser.
+
+    The fallback keeps the stdlib error messages. Unlike the stdlib, orjson
+    reads integers beyond 64 bits as floats, which no model field here accepts.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        if codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(BytesIO(body), media_type, parser_context)
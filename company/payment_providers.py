@@ -0,0 +1,52 @@
+import uuid
+
+import stripe
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class PaymentProviderError(Exception):
+    """The provider declined or could not complete a charge"""
+
+
+class StripeProvider:
+    """Charge cards through Stripe PaymentIntents"""
+    name = 'Stripe'
+
+    def __init__(self, api_key=None):
+        # Passed per request instead of mutating the global stripe.api_key
+        self.api_key = api_key or settings.STRIPE_SECRET_KEY
+
+    def charge(self, payment, idempotency_key=None):
+        """Charge the payment and return the provider reference"""
+        try:
+            payment_intent = stripe.PaymentIntent.create(
+                amount=int(payment.amount * 100),  # Amount in cents
+                currency="usd",
+                payment_method_types=["card"],
+                description=f"Payment for {payment.subscription.company.name} subscription",
+                api_key=self.api_key,
+                idempotency_key=idempotency_key
+            )
+        except stripe.error.StripeError as e:
+            raise PaymentProviderError(str(e)) from e
+        return payment_intent.id
+
+
+class StubProvider:
+    """Offline provider that approves every charge, for tests and local runs"""
+    name = 'Stub'
+
+    def __init__(self):
+        self.charges = {}
+
+    def charge(self, payment, idempotency_key=None):
+        key = idempotency_key or uuid.uuid4().hex
+        # Replaying a key returns the original charge, like a real provider
+        return self.charges.setdefault(key, f"stub_pi_{uuid.uuid4().hex[:24]}")
+
+
+def get_payment_provider():
+    """Instantiate the provider class named by settings.PAYMENT_PROVIDER"""
+    provider_path = getattr(settings, 'PAYMENT_PROVIDER', 'company.payment_providers.StripeProvider')
+    return import_string(provider_path)()
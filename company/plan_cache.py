@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+PLAN_KEY = 'subscription_plan:{}'
+PLAN_LIST_KEYS = {
+    False: 'subscription_plans:all',
+    True: 'subscription_plans:active',
+}
+
+
+def _cache():
+    return caches[getattr(settings, 'PLAN_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'PLAN_CACHE_TIMEOUT', 3600)
+
+
+class _Invalidation:
+    """on_commit callback dropping a plan's cache entries.
+
+    Queued on the connection until the write commits; a rollback
+    unqueues it along with the write."""
+
+    def __init__(self, plan_id, keys):
+        self.plan_id = plan_id
+        self.keys = keys
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        _cache().delete_many(self.keys)
+
+
+def _uncommitted_plan_ids():
+    """Plans the open primary transaction has written, which must not be cached"""
+    return {
+        callback.plan_id
+        for _, callback, _ in connections[DEFAULT_DB_ALIAS].run_on_commit
+        if isinstance(callback, _Invalidation) and not callback.done
+    }
+
+
+def get_plan(plan_id):
+    """SubscriptionPlan by id, read through the plan cache"""
+    from .models import SubscriptionPlan
+
+    key = PLAN_KEY.format(plan_id)
+    plan = _cache().get(key)
+    if plan is None:
+        # Fill from the primary; a lagging replica would stay cached for the timeout
+        plan = SubscriptionPlan.objects.db_manager(DEFAULT_DB_ALIAS).get(pk=plan_id)
+        # An uncommitted row would outlive a rollback in the cache
+        if plan.pk not in _uncommitted_plan_ids():
+            _cache().set(key, plan, _timeout())
+    return plan
+
+
+def get_plans(active_only=False):
+    """All plans, or only the active ones, read through the plan cache"""
+    from .models import SubscriptionPlan
+
+    key = PLAN_LIST_KEYS[active_only]
+    plans = _cache().get(key)
+    if plans is None:
+        plans = SubscriptionPlan.objects.db_manager(DEFAULT_DB_ALIAS).all()
+        if active_only:
+            plans = plans.filter(is_active=True)
+        plans = list(plans)
+        if not _uncommitted_plan_ids():
+            _cache().set(key, plans, _timeout())
+    return plans
+
+
+def invalidate_plan(sender, instance, using=None, **kwargs):
+    """post_save/post_delete receiver dropping every cache entry a plan appears in.
+
+    Dropped now, so this transaction reads its own write, and again on
+    commit, since a concurrent reader may have cached the old row from
+    the primary in between. Until then the plan is read but not cached
+    here, so a rollback cannot leave the uncommitted row behind."""
+    keys = [PLAN_KEY.format(instance.pk), *PLAN_LIST_KEYS.values()]
+    _cache().delete_many(keys)
+    transaction.on_commit(_Invalidation(instance.pk, keys), using=using)
@@ -0,0 +1,123 @@
+import contextvars
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Stats of the request being served; None outside requests
+_current = contextvars.ContextVar('query_stats', default=None)
+
+
+class QueryStats:
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper adding each query's count and time to the current request"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.count += 1
+        stats.duration += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver putting record_query on every connection, once"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def view_key(request):
+    """`ViewsetClass.action` for DRF viewsets, else the URL name"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    cls = getattr(match.func, 'cls', None)
+    actions = getattr(match.func, 'actions', None)
+    if cls is not None and actions:
+        action = actions.get(request.method.lower())
+        if action:
+            return f'{cls.__name__}.{action}'
+    return match.view_name
+
+
+def query_budget(key):
+    """Query budget for a view key from settings.QUERY_BUDGETS, falling back to 'default'"""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(key, budgets.get('default'))
+
+
+class QueryBudgetMiddleware:
+    """Count queries and DB time per request; report them and flag blown budgets.
+
+    The totals go out in a Server-Timing header and one log line per request.
+    Queries run while a streaming response is consumed are not counted.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = QueryStats()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, stats)
+
+    def report(self, request, response, stats):
+        key = view_key(request)
+        db_ms = stats.duration * 1000
+        timing = f'db;dur={db_ms:.1f};desc="{stats.count} queries"'
+        if response.has_header('Server-Timing'):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response['Server-Timing'] = timing
+        # Kept on the response for QueryBudgetAssertions
+        response.query_stats = stats
+        response.query_view = key
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': key,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': round(db_ms, 1),
+        }
+        message = ' '.join(f'{name}={value}' for name, value in record.items())
+        logger.info(f'request {message}', extra={'query_budget': record})
+
+        budget = query_budget(key)
+        if budget is not None and stats.count > budget:
+            logger.warning(
+                f'Query budget exceeded: {key} ran {stats.count} queries (budget {budget})',
+                extra={'query_budget': dict(record, budget=budget)}
+            )
+        return response
@@ -0,0 +1,71 @@
+import math
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+# Byte-level escapes JSONRenderer applies for JavaScript compatibility
+LINE_SEPARATORS = (
+    (b'\xe2\x80\xa8', b'\\u2028'),
+    (b'\xe2\x80\xa9', b'\\u2029'),
+)
+
+# Values that need no look inside, by exact type
+SCALAR_TYPES = frozenset((str, int, bool, type(None)))
+
+
+def has_stock_only_float(data):
+    """Whether the data holds a float orjson would not render like the stdlib.
+
+    The stdlib writes exponent form (1e+16, 2.5e-05) below 1e-4 and from 1e16
+    up, orjson writes 1e16 and 0.000025; NaN and infinity come out as null
+    where the stdlib raises under STRICT_JSON."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        kind = type(value)
+        if kind in SCALAR_TYPES:
+            continue
+        if kind is float:
+            if not math.isfinite(value) or (value and not 1e-4 <= abs(value) < 1e16):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer on orjson, byte-identical to the stdlib output.
+
+    orjson formats datetimes itself and hands everything else it does not
+    know (Decimal, lazy strings, querysets...) to the DRF encoder, the same
+    hook the stdlib renderer uses. Output options orjson cannot express
+    (indent, ASCII escaping, non-compact separators, non-strict floats),
+    values it rejects and payloads holding floats it formats differently
+    fall back to the stdlib renderer, which then also raises ValueError for
+    NaN and infinity as usual.
+    """
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if (
+            self.get_indent(accepted_media_type, renderer_context)
+            or self.ensure_ascii or not self.compact or not self.strict
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if has_stock_only_float(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except (orjson.JSONEncodeError, TypeError, ValueError):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Both separators start with 0xE2; a one-byte scan skips the common case
+        if b'\xe2' in ret:
+            for raw, escaped in LINE_SEPARATORS:
+                ret = ret.replace(raw, escaped)
+        return ret
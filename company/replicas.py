@@ -0,0 +1,107 @@
+import contextvars
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+# Per-request routing state; None outside requests (commands, shells), which
+# therefore always use the primary
+_routing = contextvars.ContextVar('replica_routing', default=None)
+
+
+class RoutingState:
+    __slots__ = ('replica_allowed', 'wrote')
+
+    def __init__(self):
+        self.replica_allowed = False
+        self.wrote = False
+
+
+def replica_alias():
+    """The configured replica alias, or None when it is the primary's own database"""
+    alias = getattr(settings, 'REPLICA_DATABASE', None)
+    if alias not in settings.DATABASES:
+        return None
+    # A replica pointing at the primary's database (the default local setup,
+    # and test mirrors) would only add a second connection
+    if connections[alias].settings_dict['NAME'] == connections[DEFAULT_DB_ALIAS].settings_dict['NAME']:
+        return None
+    return alias
+
+
+@contextmanager
+def request_routing():
+    """Scope routing state to one request"""
+    token = _routing.set(RoutingState())
+    try:
+        yield _routing.get()
+    finally:
+        _routing.reset(token)
+
+
+def allow_replica_reads():
+    """Let the current request read from the replica until it writes"""
+    state = _routing.get()
+    if state is not None:
+        state.replica_allowed = True
+
+
+class ReplicaRouter:
+    """Send reads of replica-eligible requests to the replica, everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if (
+            state is None or not state.replica_allowed or state.wrote
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return replica_alias() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Reads after a write in the same request must see it
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, getattr(settings, 'REPLICA_DATABASE', None)}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Give each request, sync or async, its own routing state"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_routing():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with request_routing():
+            return await self.get_response(request)
+
+
+class ReplicaReadsMixin:
+    """Route the reads of safe requests to `replica_actions` to the replica"""
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication above still reads from the primary
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and self.action in self.replica_actions:
+            allow_replica_reads()
@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
-from .models import Company, SubscriptionPlan, Subscription, Payment
+from .models import Company, SubscriptionPlan, Subscription, Payment, PaymentJob
 
 
 
@@ -117,21 +117,47 @@ class PaymentSerializer(serializers.ModelSerializer):
         return data    
 
 
+class PaymentJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PaymentJob
+        fields = [
+            'id', 'payment', 'idempotency_key', 'status',
+            'attempts', 'last_error', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+def prefetched(instance, to_attr, related_name):
+    """Rows prefetched into `to_attr` by the viewset, else the related manager"""
+    rows = getattr(instance, to_attr, None)
+    if rows is None:
+        rows = getattr(instance, related_name).all()
+    return rows
+
+
 class CompanyDetailSerializer(CompanySerializer):
     active_subscription = SubscriptionSerializer(read_only=True)
-    users = UserSerializer(many=True, read_only=True)
+    users = serializers.SerializerMethodField()
 
     class Meta(CompanySerializer.Meta):
         fields = CompanySerializer.Meta.fields + ['active_subscription', 'users']
 
+    def get_users(self, obj):
+        users = prefetched(obj, 'prefetched_users', 'users')
+        return UserSerializer(users, many=True, context=self.context).data
+
 class SubscriptionDetailSerializer(SubscriptionSerializer):
     company = CompanySerializer(read_only=True)
     plan = SubscriptionPlanSerializer(read_only=True)
-    payments = PaymentSerializer(many=True, read_only=True)
+    payments = serializers.SerializerMethodField()
 
     class Meta(SubscriptionSerializer.Meta):
         fields = SubscriptionSerializer.Meta.fields + ['payments']
 
+    def get_payments(self, obj):
+        payments = prefetched(obj, 'prefetched_payments', 'payments')
+        return PaymentSerializer(payments, many=True, context=self.context).data
+
 
 class UserUpdateSerializer(serializers.ModelSerializer):
 
@@ -143,4 +169,35 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         user_id = self.instance.id if self.instance else None
         if User.objects.exclude(id=user_id).filter(email=value).exists():
             raise serializers.ValidationError("Email already exists")
-        return value
\ No newline at end of file
+        return value
+
+class RevenueMovementSerializer(serializers.Serializer):
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    new_subscriptions = serializers.IntegerField()
+    renewed_subscriptions = serializers.IntegerField()
+    churned_subscriptions = serializers.IntegerField()
+    mrr_change = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class RevenueDaySerializer(RevenueMovementSerializer):
+    day = serializers.DateField()
+    mrr = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class RevenuePlanSerializer(RevenueMovementSerializer):
+    plan = serializers.IntegerField(source='plan_id')
+    plan_name = serializers.CharField(source='plan__name')
+    billing_cycle = serializers.CharField()
+
+
+class RevenueTotalsSerializer(RevenueMovementSerializer):
+    mrr_start = serializers.DecimalField(max_digits=14, decimal_places=2)
+    mrr_end = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class RevenueSummarySerializer(serializers.Serializer):
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    totals = RevenueTotalsSerializer()
+    by_day = RevenueDaySerializer(many=True)
+    by_plan = RevenuePlanSerializer(many=True)
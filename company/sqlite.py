@@ -0,0 +1,22 @@
+import re
+
+from django.conf import settings
+
+PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE = re.compile(r'^-?\w+$')
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """connection_created receiver applying settings.SQLITE_PRAGMAS to new SQLite connections"""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    cursor = connection.connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            value = str(value)
+            if not PRAGMA_NAME.match(name) or not PRAGMA_VALUE.match(value):
+                raise ValueError(f"Invalid SQLite pragma: {name} = {value}")
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
@@ -0,0 +1,31 @@
+from contextlib import ExitStack
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from company.query_budget import query_budget
+
+
+class QueryBudgetAssertions:
+    """TestCase mixin checking requests against settings.QUERY_BUDGETS"""
+
+    def assertWithinQueryBudget(self, view, path, method='get', data=None, **extra):
+        """Request `path` and fail if `view` ran more queries than its budget allows"""
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in self.databases
+            ]
+            response = getattr(self.client, method)(path, data, **extra)
+        self.assertEqual(response.query_view, view)
+
+        budget = query_budget(view)
+        count = response.query_stats.count
+        if budget is not None and count > budget:
+            queries = '\n'.join(
+                f'{number}. {query["sql"]}'
+                for number, query in enumerate(
+                    (query for context in captured for query in context.captured_queries), start=1
+                )
+            )
+            self.fail(f'{view} ran {count} queries, budget is {budget}:\n{queries}')
+        return response
@@ -1,9 +1,18 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
-from company.models import Company, SubscriptionPlan, Subscription, Payment
+from company.models import Company, SubscriptionPlan, Subscription, Payment, PaymentJob, User
+from company.payment_providers import PaymentProviderError
 from django.utils import timezone
 from decimal import Decimal
+import json
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from unittest import mock
+from dateutil.relativedelta import relativedelta
 class CompanyAPITests(APITestCase):
     def setUp(self):
         self.company_data = {
@@ -85,6 +94,7 @@ class SubscriptionPlanAPITests(APITestCase):
         self.assertEqual(created_plan.user_limit, 10)
 
 
+@override_settings(PAYMENT_PROVIDER='company.payment_providers.StubProvider')
 class SubscriptionWorkflowTests(APITestCase):
     def setUp(self):
         # Create company
@@ -131,10 +141,12 @@ class SubscriptionWorkflowTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         payment_id = response.data['id']
 
-        # 3. Process payment
+        # 3. Process payment: queued by the API, charged by the worker
         process_url = reverse('payment-process', kwargs={'pk': payment_id})
         response = self.client.post(process_url)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        call_command('process_payment_jobs', stdout=StringIO())
+        self.assertEqual(Payment.objects.get(pk=payment_id).status, 'completed')
 
         # 4. Suspend subscription
         suspend_url = reverse('subscription-suspend', kwargs={'pk': subscription_id})
@@ -146,6 +158,7 @@ class SubscriptionWorkflowTests(APITestCase):
         response = self.client.post(renew_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+@override_settings(PAYMENT_PROVIDER='company.payment_providers.StubProvider')
 class PaymentAPITests(APITestCase):
     def setUp(self):
         # Create necessary objects for payment testing
@@ -177,9 +190,550 @@ class PaymentAPITests(APITestCase):
         # Process payment
         process_url = reverse('payment-process', kwargs={'pk': payment_id})
         response = self.client.post(process_url)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        call_command('process_payment_jobs', stdout=StringIO())
+        self.assertEqual(Payment.objects.get(pk=payment_id).status, 'completed')
+
+class DetailQueryCountTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Test Company')
+        self.plan = SubscriptionPlan.objects.create(
+            name='Basic Plan',
+            billing_cycle='monthly',
+            pricing_model='flat_fee',
+            cost='99.99'
+        )
+        self.subscription = Subscription.objects.create(
+            company=self.company,
+            plan=self.plan,
+            end_date=timezone.now() + timezone.timedelta(days=30)
+        )
+        for i in range(3):
+            User.objects.create(username=f'user{i}', company=self.company)
+            Payment.objects.create(
+                subscription=self.subscription,
+                amount=Decimal('99.99'),
+                method='bank_transfer'
+            )
+
+    def test_company_detail_query_count(self):
+        url = reverse('company-detail', kwargs={'pk': self.company.pk})
+        # Validator lookup, then the company and its prefetched users
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['users']), 3)
+        self.assertEqual(response.data['active_subscription']['id'], self.subscription.id)
+
+    def test_subscription_detail_query_count(self):
+        url = reverse('subscription-detail', kwargs={'pk': self.subscription.pk})
+        # Validator lookup, then the subscription and its prefetched payments
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['payments']), 3)
+        self.assertEqual(response.data['company']['name'], 'Test Company')
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Test Company')
+        self.plan = SubscriptionPlan.objects.create(
+            name='Basic Plan',
+            billing_cycle='monthly',
+            pricing_model='flat_fee',
+            cost='99.99'
+        )
+        self.subscription = Subscription.objects.create(
+            company=self.company,
+            plan=self.plan,
+            end_date=timezone.now() + timezone.timedelta(days=30)
+        )
+        for i in range(5):
+            User.objects.create(username=f'user{i}', company=self.company)
+            Payment.objects.create(
+                subscription=self.subscription,
+                amount=Decimal('99.99'),
+                method='bank_transfer'
+            )
+
+    def test_payments_follow_next_cursor(self):
+        url = reverse('payment-list')
+        seen = []
+        response = self.client.get(url, {'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(payment['id'] for payment in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, sorted(Payment.objects.values_list('id', flat=True)))
+
+    def test_subscriptions_sharing_a_start_date_page_by_keyset(self):
+        # As bulk_renew leaves them: many rows with one start_date
+        start = timezone.now()
+        companies = Company.objects.bulk_create([Company(name=f'Renewed {i}') for i in range(7)])
+        Subscription.objects.bulk_create([
+            Subscription(company=company, plan=self.plan, start_date=start, status='expired')
+            for company in companies
+        ])
+        url = reverse('subscription-list')
+        seen = []
+        response = self.client.get(url, {'page_size': 3})
+        while True:
+            seen.extend(subscription['id'] for subscription in response.data['results'])
+            if not response.data['next']:
+                break
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(response.data['next'])
+            self.assertNotIn('OFFSET', queries[-1]['sql'])
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(sorted(seen), sorted(Subscription.objects.values_list('id', flat=True)))
+
+        previous = self.client.get(response.data['previous'])
+        self.assertEqual(
+            [subscription['id'] for subscription in previous.data['results']],
+            seen[-len(response.data['results']) - 3:-len(response.data['results'])]
+        )
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(reverse('payment-list'), {'cursor': 'cD0yMDI2'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_users_by_company_is_paginated(self):
+        url = reverse('user-by-company')
+        response = self.client.get(url, {'company_id': self.company.id, 'page_size': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [user['username'] for user in response.data['results']],
+            ['user0', 'user1', 'user2']
+        )
+        self.assertIsNotNone(response.data['next'])
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Test Company')
+        self.plan = SubscriptionPlan.objects.create(
+            name='Basic Plan',
+            billing_cycle='monthly',
+            pricing_model='flat_fee',
+            cost='99.99'
+        )
+        self.subscription = Subscription.objects.create(company=self.company, plan=self.plan)
+        for days_ago in (40, 10, 1):
+            Payment.objects.create(
+                subscription=self.subscription,
+                amount=Decimal('99.99'),
+                method='bank_transfer',
+                status='completed',
+                payment_date=timezone.now() - timezone.timedelta(days=days_ago)
+            )
+
+    def test_payment_ndjson_export_filters_by_date(self):
+        url = reverse('payment-export')
+        date_from = (timezone.now() - timezone.timedelta(days=30)).date().isoformat()
+        response = self.client.get(url, {
+            'file_format': 'ndjson', 'status': 'completed', 'date_from': date_from
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['amount'], '99.99')
+
+    def test_subscription_csv_export(self):
+        response = self.client.get(reverse('subscription-export'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'company', 'plan'])
+        self.assertEqual(len(lines), 2)
+
+    def test_invalid_date_is_rejected(self):
+        response = self.client.get(reverse('payment-export'), {'date_from': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RevenueAnalyticsTests(APITestCase):
+    def setUp(self):
+        self.plan = SubscriptionPlan.objects.create(
+            name='Yearly Plan',
+            billing_cycle='yearly',
+            pricing_model='flat_fee',
+            cost='120.00'
+        )
+        self.companies = [Company.objects.create(name=f'Company {i}') for i in range(2)]
+        self.subscriptions = [
+            Subscription.objects.create(company=company, plan=self.plan)
+            for company in self.companies
+        ]
+
+    def test_rollup_tracks_revenue_churn_and_renewals(self):
+        Payment.objects.create(
+            subscription=self.subscriptions[0],
+            amount=Decimal('120.00'),
+            method='bank_transfer',
+            status='completed'
+        )
+        self.subscriptions[0].renew()
+        self.subscriptions[1].expire()
+
+        today = timezone.localdate().isoformat()
+        response = self.client.get(
+            reverse('analytics-revenue'), {'date_from': today, 'date_to': today}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        totals = response.data['totals']
+        self.assertEqual(totals['revenue'], '120.00')
+        self.assertEqual(totals['new_subscriptions'], 2)
+        self.assertEqual(totals['renewed_subscriptions'], 1)
+        self.assertEqual(totals['churned_subscriptions'], 1)
+        self.assertEqual(totals['mrr_end'], '10.00')
+        self.assertEqual(response.data['by_plan'][0]['plan_name'], 'Yearly Plan')
+
+    def test_bad_plan_filter_is_rejected(self):
+        response = self.client.get(reverse('analytics-revenue'), {'plan': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse('analytics-revenue'), {'plan': self.plan.pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_rebuild_matches_new_subscriptions(self):
+        call_command('rebuild_revenue_rollup', stdout=StringIO())
+        today = timezone.localdate().isoformat()
+        response = self.client.get(
+            reverse('analytics-revenue'), {'date_from': today, 'date_to': today}
+        )
+        self.assertEqual(response.data['totals']['new_subscriptions'], 2)
+        self.assertEqual(response.data['totals']['mrr_end'], '20.00')
+
+    def test_invalid_range_is_rejected(self):
+        response = self.client.get(reverse('analytics-revenue'), {'date_from': 'last week'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+
+@override_settings(PAYMENT_PROVIDER='company.payment_providers.StubProvider')
+class PaymentQueueTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Test Company')
+        self.plan = SubscriptionPlan.objects.create(
+            name='Basic Plan',
+            billing_cycle='monthly',
+            pricing_model='flat_fee',
+            cost='99.99'
+        )
+        self.subscription = Subscription.objects.create(company=self.company, plan=self.plan)
+        self.payment = Payment.objects.create(
+            subscription=self.subscription,
+            amount=Decimal('99.99'),
+            method='credit_card'
+        )
+        self.url = reverse('payment-process', kwargs={'pk': self.payment.pk})
+
+    def test_retries_with_same_key_enqueue_once(self):
+        for _ in range(3):
+            response = self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='retry-1')
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(PaymentJob.objects.count(), 1)
+
+        call_command('process_payment_jobs', stdout=StringIO())
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'completed')
+
+        response = self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['job']['status'], 'succeeded')
+
+    def test_abandoned_processing_job_is_claimed_again(self):
+        stale = PaymentJob.objects.create(
+            payment=self.payment, idempotency_key='crashed', status='processing', attempts=1
+        )
+        PaymentJob.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - timezone.timedelta(hours=1))
+
+        call_command('process_payment_jobs', stdout=StringIO())
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'succeeded')
+        self.assertEqual(stale.attempts, 2)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'completed')
+
+    def test_reclaimed_job_ignores_the_superseded_worker(self):
+        job = PaymentJob.objects.create(
+            payment=self.payment, idempotency_key='slow', status='processing', attempts=1
+        )
+        # Past the visibility timeout, a second worker claims the job again
+        PaymentJob.objects.filter(pk=job.pk).update(attempts=2)
+
+        class DecliningProvider:
+            name = 'Declining'
+
+            def charge(self, payment, idempotency_key=None):
+                raise PaymentProviderError('card declined')
+
+        self.assertFalse(job.run(DecliningProvider()))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'processing')
+        self.assertIsNone(job.last_error)
+
+    def test_recent_processing_job_is_left_alone(self):
+        PaymentJob.objects.create(payment=self.payment, idempotency_key='running', status='processing')
+
+        call_command('process_payment_jobs', stdout=StringIO())
+
+        self.assertEqual(PaymentJob.objects.get().status, 'processing')
+
+    def test_queued_payments_for_one_subscription_all_extend_it(self):
+        end_date = self.subscription.end_date
+        payments = [self.payment] + [
+            Payment.objects.create(subscription=self.subscription, amount=Decimal('99.99'), method='credit_card')
+            for _ in range(2)
+        ]
+        for payment in payments:
+            self.client.post(reverse('payment-process', kwargs={'pk': payment.pk}), HTTP_IDEMPOTENCY_KEY=f'pay-{payment.pk}')
+
+        call_command('process_payment_jobs', stdout=StringIO())
+
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.end_date, end_date + relativedelta(months=3))
+
+    def test_second_key_for_queued_payment_reuses_open_job(self):
+        self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='first')
+        response = self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='second')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['job']['idempotency_key'], 'first')
+        self.assertEqual(PaymentJob.objects.count(), 1)
+
+
+class BulkRenewTests(APITestCase):
+    def setUp(self):
+        self.yearly = SubscriptionPlan.objects.create(
+            name='Yearly Plan',
+            billing_cycle='yearly',
+            pricing_model='flat_fee',
+            cost='120.00'
+        )
+        self.quarterly = SubscriptionPlan.objects.create(
+            name='Quarterly Plan',
+            billing_cycle='quarterly',
+            pricing_model='flat_fee',
+            cost='30.00'
+        )
+        self.companies = [Company.objects.create(name=f'Company {i}') for i in range(3)]
+        for company in self.companies[:2]:
+            Subscription.objects.create(company=company, plan=self.yearly)
+        Subscription.objects.create(company=self.companies[2], plan=self.quarterly)
+        self.companies[0].suspend()
+        self.url = reverse('subscription-bulk-renew')
+
+    def test_renews_matching_plan_in_bulk(self):
+        # Constant in the number of subscriptions: one rollup pair per plan
+        with self.assertNumQueries(13):
+            response = self.client.post(self.url, {'plan': self.yearly.pk})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['renewed'], 2)
+        self.assertEqual(response.data['reactivated_companies'], 1)
+        self.assertEqual(Subscription.objects.filter(plan=self.yearly, status='expired').count(), 2)
+
+        for company in Company.objects.filter(pk__in=[c.pk for c in self.companies[:2]]):
+            self.assertEqual(company.status, 'active')
+            renewed = company.active_subscription
+            self.assertEqual(renewed.status, 'active')
+            self.assertEqual(renewed.end_date.year, renewed.start_date.year + 1)
+
+        today = timezone.localdate().isoformat()
+        totals = self.client.get(
+            reverse('analytics-revenue'), {'date_from': today, 'date_to': today}
+        ).data['totals']
+        self.assertEqual(totals['renewed_subscriptions'], 2)
+        self.assertEqual(totals['churned_subscriptions'], 0)
+
+    def test_rollup_does_not_need_returned_pks(self):
+        # As on backends whose bulk_create cannot return primary keys
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            response = self.client.post(self.url, {'plan': self.yearly.pk})
+        self.assertEqual(response.data['renewed'], 2)
+
+        today = timezone.localdate().isoformat()
+        totals = self.client.get(
+            reverse('analytics-revenue'), {'date_from': today, 'date_to': today}
+        ).data['totals']
+        self.assertEqual(totals['renewed_subscriptions'], 2)
+
+    def test_end_dates_follow_billing_cycle(self):
+        response = self.client.post(self.url, {'billing_cycle': 'quarterly'})
+        self.assertEqual(response.data['renewed'], 1)
+        renewed = Company.objects.get(pk=self.companies[2].pk).active_subscription
+        self.assertEqual(
+            renewed.end_date.date(),
+            (renewed.start_date + relativedelta(months=3)).date()
+        )
+
+    def test_filter_is_required(self):
+        response = self.client.post(self.url, {})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {'end_date_to': 'soon'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_malformed_plan_is_a_bad_request(self):
+        for plan in ('abc', [self.yearly.pk], {'id': self.yearly.pk}):
+            with self.subTest(plan=plan):
+                response = self.client.post(self.url, {'plan': plan}, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(response.data['error'], 'plan must be a plan id')
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Test Company')
+        # Committed, so the plan list is cached
+        with self.captureOnCommitCallbacks(execute=True):
+            self.plan = SubscriptionPlan.objects.create(
+                name='Basic Plan',
+                billing_cycle='monthly',
+                pricing_model='flat_fee',
+                cost='99.99'
+            )
+        self.subscription = Subscription.objects.create(company=self.company, plan=self.plan)
+        self.user = User.objects.create(username='user0', company=self.company)
+
+    def test_plan_list_answers_304_until_a_plan_changes(self):
+        url = reverse('subscriptionplan-list')
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        # Validators come from the plan cache
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        SubscriptionPlan.objects.create(
+            name='Pro Plan', billing_cycle='monthly', pricing_model='flat_fee', cost='199.99'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_paginated_lists_skip_the_validator_query(self):
+        for name in ('company-list', 'subscription-list'):
+            with self.subTest(name=name):
+                with self.assertNumQueries(1):
+                    response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertFalse(response.has_header('ETag'))
+
+    def test_company_detail_tracks_nested_users(self):
+        url = reverse('company-detail', kwargs={'pk': self.company.pk})
+        response = self.client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.user.email = 'user0@example.com'
+        self.user.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['users'][0]['email'], 'user0@example.com')
+
+    def test_subscription_detail_and_missing_rows(self):
+        url = reverse('subscription-detail', kwargs={'pk': self.subscription.pk})
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(reverse('subscription-detail', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class FastListTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Test Company')
+        plan = SubscriptionPlan.objects.create(
+            name='Basic Plan',
+            billing_cycle='monthly',
+            pricing_model='flat_fee',
+            cost='99.99'
+        )
+        self.subscription = Subscription.objects.create(company=self.company, plan=plan)
+        for i in range(3):
+            User.objects.create(username=f'user{i}', email=f'user{i}@example.com', company=self.company)
+            Payment.objects.create(
+                subscription=self.subscription,
+                amount=Decimal('99.99'),
+                method='bank_transfer',
+                payment_date=timezone.now() - timezone.timedelta(days=i)
+            )
+
+    def test_fast_mode_matches_serializer_output(self):
+        for name in ('payment-list', 'subscription-list', 'user-list'):
+            url = reverse(name)
+            regular = self.client.get(url, {'page_size': 2})
+            fast = self.client.get(url, {'page_size': 2, 'fast': 'true'})
+            self.assertEqual(fast.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                json.loads(fast.content)['results'], json.loads(regular.content)['results'], name
+            )
+
+    def test_fast_mode_follows_cursor(self):
+        url = reverse('payment-list')
+        first = self.client.get(url, {'page_size': 2, 'fast': 'true'})
+        second = self.client.get(first.data['next'])
+        ids = [row['id'] for row in first.data['results'] + second.data['results']]
+        self.assertEqual(sorted(ids), sorted(Payment.objects.values_list('id', flat=True)))
+
+
+class AsyncReadTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Test Company')
+        plan = SubscriptionPlan.objects.create(
+            name='Basic Plan',
+            billing_cycle='monthly',
+            pricing_model='flat_fee',
+            cost='99.99'
+        )
+        self.subscription = Subscription.objects.create(company=self.company, plan=plan)
+        for i in range(3):
+            User.objects.create(username=f'user{i}', company=self.company)
+            Payment.objects.create(
+                subscription=self.subscription,
+                amount=Decimal('99.99'),
+                method='bank_transfer'
+            )
+
+    async def test_details_match_sync_viewsets(self):
+        pairs = [
+            ('company-detail', 'async-company-detail', self.company.pk),
+            ('subscription-detail', 'async-subscription-detail', self.subscription.pk),
+        ]
+        for sync_name, async_name, pk in pairs:
+            response = await self.async_client.get(reverse(async_name, kwargs={'pk': pk}))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            expected = await self.async_client.get(reverse(sync_name, kwargs={'pk': pk}))
+            self.assertEqual(json.loads(response.content), json.loads(expected.content))
+
+        response = await self.async_client.get(reverse('async-company-detail', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_active_subscription_lookup(self):
+        url = reverse('async-company-active-subscription', kwargs={'pk': self.company.pk})
+        response = await self.async_client.get(url)
+        data = json.loads(response.content)
+        self.assertEqual(data['id'], self.subscription.pk)
+        self.assertEqual(len(data['payments']), 3)
+
+    async def test_users_by_company_pages_by_username(self):
+        url = reverse('async-users-by-company')
+        response = await self.async_client.get(url, {'company_id': self.company.pk, 'page_size': 2})
+        first = json.loads(response.content)
+        self.assertEqual([user['username'] for user in first['results']], ['user0', 'user1'])
+
+        response = await self.async_client.get(first['next'])
+        second = json.loads(response.content)
+        self.assertEqual([user['username'] for user in second['results']], ['user2'])
+        self.assertIsNone(second['next'])
 
-        # Refund payment
-        refund_url = reverse('payment-refund', kwargs={'pk': payment_id})
-        response = self.client.post(refund_url)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
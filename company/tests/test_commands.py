@@ -0,0 +1,152 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.db.models import QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from datetime import timedelta
+from dateutil.relativedelta import relativedelta
+from io import StringIO
+from unittest import mock
+from company.models import Company, SubscriptionPlan, Subscription, Payment, PaymentJob, User
+
+
+class ExpireSubscriptionsCommandTest(TestCase):
+    def setUp(self):
+        self.plan = SubscriptionPlan.objects.create(
+            name='Basic Plan',
+            billing_cycle='monthly',
+            pricing_model='flat_fee',
+            cost='99.99'
+        )
+        self.subscriptions = []
+        for i in range(3):
+            company = Company.objects.create(name=f'Company {i}')
+            self.subscriptions.append(Subscription.objects.create(
+                company=company,
+                plan=self.plan,
+                end_date=timezone.now() + timedelta(days=10)
+            ))
+            User.objects.create(username=f'user{i}', company=company)
+
+    def test_expires_overdue_subscriptions_in_chunks(self):
+        overdue_ids = [sub.id for sub in self.subscriptions[:2]]
+        Subscription.objects.filter(id__in=overdue_ids).update(
+            end_date=timezone.now() - timedelta(days=1)
+        )
+
+        out = StringIO()
+        call_command('expire_subscriptions', chunk_size=1, stdout=out)
+
+        self.assertIn('Expired 2 subscriptions and deactivated 2 users in 2 chunks', out.getvalue())
+        self.assertEqual(
+            Subscription.objects.filter(status='expired').count(), 2
+        )
+        self.assertEqual(
+            list(User.objects.filter(is_active=True).values_list('username', flat=True)),
+            ['user2']
+        )
+
+    def test_subscription_extended_after_the_read_is_left_alone(self):
+        extended = self.subscriptions[0]
+        Subscription.objects.filter(pk=extended.pk).update(end_date=timezone.now() - timedelta(days=1))
+        select_for_update = QuerySet.select_for_update
+
+        def extend_first(queryset, *args, **kwargs):
+            # A payment lands between the candidate read and the chunk lock
+            Subscription.objects.filter(pk=extended.pk).update(end_date=timezone.now() + timedelta(days=30))
+            return select_for_update(queryset, *args, **kwargs)
+
+        out = StringIO()
+        with mock.patch.object(QuerySet, 'select_for_update', extend_first):
+            call_command('expire_subscriptions', stdout=out)
+
+        self.assertIn('Expired 0 subscriptions and deactivated 0 users', out.getvalue())
+        self.assertEqual(Subscription.objects.get(pk=extended.pk).status, 'active')
+        self.assertTrue(User.objects.get(username='user0').is_active)
+        self.assertEqual(Company.objects.get(pk=extended.company_id).active_user_count, 1)
+
+
+@override_settings(PAYMENT_PROVIDER='company.payment_providers.StubProvider')
+class ProcessPendingPaymentsCommandTest(TransactionTestCase):
+    def setUp(self):
+        plan = SubscriptionPlan.objects.create(
+            name='Basic Plan',
+            billing_cycle='monthly',
+            pricing_model='flat_fee',
+            cost='99.99'
+        )
+        company = Company.objects.create(name='Test Company')
+        self.subscription = Subscription.objects.create(
+            company=company,
+            plan=plan,
+            end_date=timezone.now() + timedelta(days=10)
+        )
+        for _ in range(5):
+            Payment.objects.create(
+                subscription=self.subscription,
+                amount='99.99',
+                method='credit_card'
+            )
+
+    def test_processes_pending_payments_across_workers(self):
+        # The shared-cache in-memory test database locks whole tables, so a
+        # single worker thread; it still runs on its own connection
+        out = StringIO()
+        call_command('process_pending_payments', workers=1, batch_size=2, stdout=out)
+
+        self.assertIn('Processed 5 payments', out.getvalue())
+        self.assertIn('0 failed', out.getvalue())
+        self.assertEqual(Payment.objects.filter(status='completed').count(), 5)
+        self.assertEqual(PaymentJob.objects.filter(status='succeeded').count(), 5)
+
+    def test_every_payment_extends_the_subscription(self):
+        end_date = self.subscription.end_date
+
+        call_command('process_pending_payments', workers=1, batch_size=5, stdout=StringIO())
+
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.end_date, end_date + relativedelta(months=5))
+
+    def test_skips_payments_with_open_jobs_and_honours_limit(self):
+        queued = Payment.objects.first()
+        PaymentJob.objects.create(payment=queued, idempotency_key='api-key')
+
+        out = StringIO()
+        call_command('process_pending_payments', workers=1, limit=3, stdout=out)
+
+        self.assertIn('Processed 3 payments', out.getvalue())
+        self.assertEqual(Payment.objects.get(pk=queued.pk).status, 'pending')
+
+
+    def test_retries_payment_whose_earlier_job_failed(self):
+        payment = Payment.objects.first()
+        PaymentJob.objects.create(
+            payment=payment, idempotency_key=f'payment-{payment.pk}', status='failed', attempts=1
+        )
+
+        out = StringIO()
+        call_command('process_pending_payments', workers=1, stdout=out)
+
+        self.assertIn('Processed 5 payments', out.getvalue())
+        self.assertEqual(Payment.objects.get(pk=payment.pk).status, 'completed')
+        self.assertEqual(
+            PaymentJob.objects.get(payment=payment, status='succeeded').idempotency_key,
+            f'payment-{payment.pk}-2'
+        )
+
+    def test_closes_each_worker_connection_once(self):
+        with mock.patch.object(type(connections['default']), 'close', autospec=True) as close:
+            call_command('process_pending_payments', workers=1, batch_size=2, stdout=StringIO())
+        self.assertEqual(close.call_count, 1)
+        self.assertIsNot(close.call_args.args[0], connections['default'])
+
+class BenchmarkIndexesCommandTest(TestCase):
+    def test_refuses_backends_without_transactional_ddl(self):
+        with mock.patch.object(connection.features, 'can_rollback_ddl', False):
+            with self.assertRaisesRegex(CommandError, 'commits DDL implicitly'):
+                call_command('benchmark_indexes', companies=1, stdout=StringIO())
+        self.assertIn(
+            'subscriptions_active_end_idx',
+            connection.introspection.get_constraints(connection.cursor(), 'subscriptions')
+        )
@@ -0,0 +1,215 @@
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from company.models import Company, SubscriptionPlan, Subscription, User
+from company.plan_cache import PLAN_KEY, get_plan, get_plans
+
+
+class ActiveSubscriptionPointerTest(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Test Company')
+        self.plan = SubscriptionPlan.objects.create(
+            name='Basic Plan',
+            billing_cycle='monthly',
+            pricing_model='flat_fee',
+            cost='99.99'
+        )
+
+    def test_pointer_follows_subscription_status(self):
+        subscription = Subscription.objects.create(company=self.company, plan=self.plan)
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.active_subscription, subscription)
+
+        subscription.expire()
+        self.company.refresh_from_db()
+        self.assertIsNone(self.company.active_subscription)
+
+        renewed = subscription.renew()
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.active_subscription_id, renewed.id)
+
+    def test_stale_company_save_keeps_pointer(self):
+        subscription = Subscription.objects.create(company=self.company, plan=self.plan)
+        stale = Company.objects.get(pk=self.company.pk)
+        renewed = subscription.renew()
+
+        stale.name = 'Renamed Company'
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual(stale.active_subscription_id, renewed.id)
+
+    def test_active_subscription_read_is_a_join(self):
+        subscription = Subscription.objects.create(
+            company=self.company,
+            plan=self.plan,
+            end_date=timezone.now() + timedelta(days=30)
+        )
+        with self.assertNumQueries(1):
+            company = Company.objects.select_related('active_subscription').get(pk=self.company.pk)
+            self.assertEqual(company.active_subscription, subscription)
+
+
+class SeatCounterTest(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Test Company')
+        self.plan = SubscriptionPlan.objects.create(
+            name='Team Plan',
+            billing_cycle='monthly',
+            pricing_model='per_user',
+            cost='10.00',
+            user_limit=2
+        )
+        Subscription.objects.create(company=self.company, plan=self.plan)
+
+    def test_counter_tracks_activation_and_enforces_limit(self):
+        first = User.objects.create(username='first', company=self.company)
+        User.objects.create(username='second', company=self.company)
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.active_user_count, 2)
+
+        with self.assertRaises(ValidationError):
+            User.objects.create(username='third', company=self.company)
+
+        first.delete()
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.active_user_count, 1)
+
+        User.objects.create(username='third', company=self.company)
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.active_user_count, 2)
+
+    def test_claim_seat_refuses_when_full(self):
+        Company.objects.filter(pk=self.company.pk).update(active_user_count=2)
+        self.company.refresh_from_db()
+        with self.assertRaises(ValidationError):
+            self.company.claim_seat()
+
+    def test_suspend_resets_counter(self):
+        User.objects.create(username='first', company=self.company)
+        self.company.suspend()
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.active_user_count, 0)
+
+
+    def test_stale_company_save_keeps_counter(self):
+        stale = Company.objects.get(pk=self.company.pk)
+        User.objects.create(username='first', company=self.company)
+        User.objects.create(username='second', company=self.company)
+
+        stale.activate()
+        stale.refresh_from_db()
+        self.assertEqual(stale.active_user_count, 2)
+        with self.assertRaises(ValidationError):
+            User.objects.create(username='third', company=self.company)
+
+    def test_deferred_is_active_claims_no_extra_seat(self):
+        User.objects.create(username='first', company=self.company)
+        user = User.objects.only('username').get(username='first')
+        user.first_name = 'Renamed'
+        user.save()
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.active_user_count, 1)
+
+
+class UserSaveQueryTest(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Test Company')
+        self.plan = SubscriptionPlan.objects.create(
+            name='Team Plan',
+            billing_cycle='monthly',
+            pricing_model='per_user',
+            cost='10.00',
+            user_limit=1
+        )
+        Subscription.objects.create(company=self.company, plan=self.plan)
+        self.user = User.objects.create(username='member', company=self.company)
+
+    def test_plain_update_skips_limit_check(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Renamed'
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_deactivating_user_in_full_company(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.active_user_count, 0)
+
+        user.is_active = True
+        user.save()
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.active_user_count, 1)
+
+
+class PlanCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Committed, so reads of it are cached
+        with self.captureOnCommitCallbacks(execute=True):
+            self.plan = SubscriptionPlan.objects.create(
+                name='Basic Plan',
+                billing_cycle='monthly',
+                pricing_model='flat_fee',
+                cost='99.99'
+            )
+        self.company = Company.objects.create(name='Test Company')
+
+    def test_reads_are_cached_and_saves_invalidate(self):
+        get_plan(self.plan.pk)
+        get_plans(active_only=True)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_plan(self.plan.pk).name, 'Basic Plan')
+            self.assertEqual(len(get_plans(active_only=True)), 1)
+
+        self.plan.is_active = False
+        self.plan.save()
+        self.assertFalse(get_plan(self.plan.pk).is_active)
+        self.assertEqual(get_plans(active_only=True), [])
+        self.assertEqual(len(get_plans()), 1)
+
+        self.plan.delete()
+        with self.assertRaises(SubscriptionPlan.DoesNotExist):
+            get_plan(self.plan.pk)
+
+    def test_invalidates_again_on_commit(self):
+        stale = get_plan(self.plan.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.plan.cost = '149.99'
+            self.plan.save()
+            # A concurrent request re-caches the row before the save commits
+            cache.set(PLAN_KEY.format(self.plan.pk), stale)
+        self.assertEqual(len(callbacks), 1)
+
+        callbacks[0]()
+        self.assertEqual(str(get_plan(self.plan.pk).cost), '149.99')
+
+    def test_uncommitted_plan_is_not_cached(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                self.plan.cost = '149.99'
+                self.plan.save()
+                self.assertEqual(str(get_plan(self.plan.pk).cost), '149.99')
+                self.assertEqual(str(get_plans()[0].cost), '149.99')
+                raise ValueError('rolled back')
+
+        self.assertEqual(str(get_plan(self.plan.pk).cost), '99.99')
+        self.assertEqual(str(get_plans()[0].cost), '99.99')
+
+    def test_subscription_save_uses_cached_plan(self):
+        subscription = Subscription.objects.create(company=self.company, plan=self.plan)
+        subscription = Subscription.objects.get(pk=subscription.pk)
+        get_plan(self.plan.pk)
+        with CaptureQueriesContext(connection) as queries:
+            subscription.expire()
+            subscription.renew()
+        plan_reads = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and 'FROM "subscription_plans"' in query['sql']
+        ]
+        self.assertEqual(plan_reads, [])
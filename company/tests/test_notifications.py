@@ -1,6 +1,16 @@
 from django.core import mail
 from django.test import TestCase
 from django.conf import settings
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+import json
+import threading
+from unittest import mock
+from company.models import Company, SubscriptionPlan, Subscription, User, NotificationLog
+from company.notifications import SlackDeliveryEngine
 
 class NotificationTest(TestCase):
     def test_email_configuration(self):
@@ -12,4 +22,143 @@ class NotificationTest(TestCase):
             fail_silently=False,
         )
         self.assertEqual(len(mail.outbox), 1)
-        self.assertEqual(mail.outbox[0].subject, 'Test Subject')
\ No newline at end of file
+        self.assertEqual(mail.outbox[0].subject, 'Test Subject')
+
+class ExpiryNotificationCommandTest(TestCase):
+    def setUp(self):
+        self.plan = SubscriptionPlan.objects.create(
+            name='Basic Plan',
+            billing_cycle='monthly',
+            pricing_model='flat_fee',
+            cost='99.99'
+        )
+        for i in range(3):
+            company = Company.objects.create(
+                name=f'Company {i}',
+                notification_email=f'billing{i}@company.com'
+            )
+            Subscription.objects.create(
+                company=company,
+                plan=self.plan,
+                end_date=timezone.now() + timedelta(days=3)
+            )
+            User.objects.create(
+                username=f'admin{i}',
+                email=f'admin{i}@company.com',
+                company=company,
+                is_staff=True
+            )
+
+    def test_sends_one_email_per_expiring_subscription(self):
+        with self.assertNumQueries(3):
+            call_command('send_expiry_notifications', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 3)
+        recipients = sorted(sorted(message.to) for message in mail.outbox)
+        self.assertEqual(recipients[0], ['admin0@company.com', 'billing0@company.com'])
+
+    def test_rerun_skips_already_notified_subscriptions(self):
+        call_command('send_expiry_notifications', stdout=StringIO())
+        self.assertEqual(NotificationLog.objects.filter(channel='email').count(), 3)
+
+        call_command('send_expiry_notifications', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_ledger_is_written_per_chunk(self):
+        send = mock.patch(
+            'company.notifications.SubscriptionNotificationManager.send_email_notification',
+            side_effect=[True, True, RuntimeError('SMTP down')]
+        )
+        with send, self.assertRaises(RuntimeError):
+            call_command('send_expiry_notifications', chunk_size=2, stdout=StringIO())
+        self.assertEqual(NotificationLog.objects.filter(channel='email').count(), 2)
+
+    def test_undeliverable_channels_are_not_pending(self):
+        company = Company.objects.create(name='Nobody', notify_slack=True)
+        Subscription.objects.create(
+            company=company,
+            plan=self.plan,
+            end_date=timezone.now() + timedelta(days=3)
+        )
+        call_command('send_expiry_notifications', stdout=StringIO())
+
+        pending = Subscription.objects.expiring_soon().pending_notification()
+        self.assertFalse(pending.exists())
+
+
+class StubSlackHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    received = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.received.append(json.loads(body))
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+class SlackDeliveryEngineTest(TestCase):
+    def setUp(self):
+        StubSlackHandler.received = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubSlackHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.stub_url = f'http://127.0.0.1:{self.server.server_port}/hook'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_fans_out_posts_to_stub_server(self):
+        with SlackDeliveryEngine(max_workers=4, webhook_override=self.stub_url) as engine:
+            futures = [
+                engine.submit('https://hooks.slack.com/services/x', {'text': str(i)})
+                for i in range(50)
+            ]
+            results = [future.result() for future in futures]
+
+        self.assertTrue(all(results))
+        self.assertEqual(len(StubSlackHandler.received), 50)
+
+    def test_failed_post_returns_false(self):
+        with SlackDeliveryEngine(timeout=1) as engine:
+            self.assertFalse(engine.post('http://127.0.0.1:1/hook', {'text': 'x'}))
+
+
+class ExpiringSoonQueryTest(TestCase):
+    def setUp(self):
+        self.plan = SubscriptionPlan.objects.create(
+            name='Basic Plan',
+            billing_cycle='monthly',
+            pricing_model='flat_fee',
+            cost='99.99'
+        )
+
+    def _subscription(self, name, days_before, days_left):
+        company = Company.objects.create(name=name, notification_days_before=days_before)
+        return Subscription.objects.create(
+            company=company,
+            plan=self.plan,
+            end_date=timezone.now() + timedelta(days=days_left)
+        )
+
+    def test_uses_each_company_window(self):
+        short_window = self._subscription('Short', days_before=3, days_left=5)
+        long_window = self._subscription('Long', days_before=10, days_left=8)
+        self._subscription('Ended', days_before=10, days_left=-1)
+
+        expiring = list(Subscription.objects.expiring_soon())
+
+        self.assertEqual(expiring, [long_window])
+        self.assertFalse(short_window.is_expiring_soon)
+        self.assertTrue(long_window.is_expiring_soon)
+
+    def test_window_scan_uses_partial_index(self):
+        self._subscription('Long', days_before=10, days_left=8)
+        plan = Subscription.objects.expiring_soon().order_by('end_date').explain()
+        # Bounded on both sides, not an open-ended scan to the last end_date
+        self.assertIn('subscriptions_active_end_idx (end_date>? AND end_date<?)', plan)
@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from company.models import Company, SubscriptionPlan, Subscription, Payment, User
+from company.tests.helpers import QueryBudgetAssertions
+
+
+class QueryBudgetTests(QueryBudgetAssertions, APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Test Company')
+        self.plan = SubscriptionPlan.objects.create(
+            name='Basic Plan',
+            billing_cycle='monthly',
+            pricing_model='flat_fee',
+            cost='99.99'
+        )
+        self.subscription = Subscription.objects.create(
+            company=self.company,
+            plan=self.plan,
+            end_date=timezone.now() + timezone.timedelta(days=30)
+        )
+        for i in range(3):
+            User.objects.create(username=f'user{i}', company=self.company)
+            Payment.objects.create(
+                subscription=self.subscription,
+                amount=Decimal('99.99'),
+                method='bank_transfer',
+                status='completed'
+            )
+        # Budgets cover real requests, JWT user lookup included
+        token = AccessToken.for_user(User.objects.get(username='user0'))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_read_actions_stay_within_budget(self):
+        today = timezone.localdate().isoformat()
+        cases = [
+            ('CompanyViewset.list', reverse('company-list'), None),
+            ('CompanyViewset.retrieve', reverse('company-detail', kwargs={'pk': self.company.pk}), None),
+            ('SubscriptionPlanViewset.list', reverse('subscriptionplan-list'), None),
+            ('SubscriptionViewset.list', reverse('subscription-list'), None),
+            ('SubscriptionViewset.retrieve', reverse('subscription-detail', kwargs={'pk': self.subscription.pk}), None),
+            ('PaymentViewset.list', reverse('payment-list'), None),
+            ('UserViewset.list', reverse('user-list'), None),
+            ('AnalyticsViewset.revenue', reverse('analytics-revenue'), {'date_from': today, 'date_to': today}),
+        ]
+        for view, url, params in cases:
+            with self.subTest(view=view):
+                response = self.assertWithinQueryBudget(view, url, data=params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('company-detail', kwargs={'pk': self.company.pk}))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=\d+\.\d;desc="\d+ queries"$')
+        self.assertEqual(response.query_view, 'CompanyViewset.retrieve')
+
+    def test_logs_request_line(self):
+        with self.assertLogs('company.query_budget', 'INFO') as logs:
+            response = self.client.get(reverse('payment-list'))
+        record = logs.records[0].query_budget
+        self.assertEqual(record['view'], 'PaymentViewset.list')
+        self.assertEqual(record['status'], status.HTTP_200_OK)
+        self.assertEqual(record['queries'], response.query_stats.count)
+        self.assertIn('view=PaymentViewset.list', logs.output[0])
+
+    @override_settings(QUERY_BUDGETS={'default': 20, 'CompanyViewset.retrieve': 2})
+    def test_warns_when_budget_exceeded(self):
+        with self.assertLogs('company.query_budget', 'WARNING') as logs:
+            self.client.get(reverse('company-detail', kwargs={'pk': self.company.pk}))
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('Query budget exceeded: CompanyViewset.retrieve', logs.output[0])
+        self.assertEqual(logs.records[0].query_budget['budget'], 2)
+
+    @override_settings(QUERY_BUDGETS={'default': 20, 'CompanyViewset.retrieve': 2})
+    def test_assertion_fails_over_budget(self):
+        url = reverse('company-detail', kwargs={'pk': self.company.pk})
+        with self.assertRaisesRegex(AssertionError, 'ran 4 queries, budget is 2'):
+            self.assertWithinQueryBudget('CompanyViewset.retrieve', url)
@@ -0,0 +1,64 @@
+import datetime
+import uuid
+import zoneinfo
+from decimal import Decimal
+from io import BytesIO
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from company.parsers import ORJSONParser
+from company.renderers import ORJSONRenderer
+
+
+class ORJSONRendererTest(SimpleTestCase):
+    def assertSameBytes(self, data, **kwargs):
+        self.assertEqual(
+            ORJSONRenderer().render(data, **kwargs), JSONRenderer().render(data, **kwargs)
+        )
+
+    def test_matches_stock_renderer(self):
+        london = zoneinfo.ZoneInfo('Europe/London')
+        self.assertSameBytes({
+            'amount': Decimal('99.99'),
+            'utc': datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc),
+            'winter': datetime.datetime(2026, 1, 1, 3, 4, 5, 123456, tzinfo=london),
+            'summer': datetime.datetime(2026, 7, 1, 3, 4, 5, tzinfo=london),
+            'naive': datetime.datetime(2026, 7, 1, 3, 4, 5),
+            'day': datetime.date(2026, 1, 2),
+            'elapsed': datetime.timedelta(days=1, seconds=3),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'label': gettext_lazy('Active'),
+            'text': 'café     \x00 / " \\ \n \U0001f600',
+            'big': 10 ** 30,
+            1: [None, True, 1.5, (1, 2)],
+        })
+
+    def test_exponent_floats_match_stock_renderer(self):
+        for value in (2.5e-5, 1e-5, 9.99e-5, 1e-7, -1e-7, 1e16, -1e301, 1e-4, 0.0, 1.5, 1e15):
+            with self.subTest(value=value):
+                self.assertSameBytes({'v': value})
+
+    def test_non_finite_floats_raise_like_stock_renderer(self):
+        for value in (float('nan'), float('inf'), float('-inf')):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    ORJSONRenderer().render({'ratio': value, 'notes': None})
+
+    def test_indent_and_empty_bodies(self):
+        self.assertSameBytes({'a': [1, 2]}, accepted_media_type='application/json; indent=2')
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+
+class ORJSONParserTest(SimpleTestCase):
+    def test_matches_stock_parser(self):
+        body = b'{"a": 1.5, "b": [1, 2, {"c": null}], "d": "\\u00e9"}'
+        self.assertEqual(
+            ORJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body))
+        )
+
+    def test_invalid_body_raises_parse_error(self):
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{bad'))
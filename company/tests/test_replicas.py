@@ -0,0 +1,61 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import connections
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from company.models import Company
+from company.replicas import allow_replica_reads, request_routing
+
+
+class ReplicaRoutingTest(TransactionTestCase):
+    """Primary and replica as two separate SQLite files"""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.replica = connections['replica']
+        self.mirror_settings = dict(self.replica.settings_dict)
+        self.replica.close()
+        self.replica.settings_dict['NAME'] = str(Path(self.tmpdir) / 'replica.sqlite3')
+        call_command('migrate', database='replica', verbosity=0)
+
+        Company.objects.create(name='Primary Company')
+        Company.objects.using('replica').create(name='Replica Company')
+        self.client = APIClient()
+
+    def tearDown(self):
+        self.replica.close()
+        self.replica.settings_dict.clear()
+        self.replica.settings_dict.update(self.mirror_settings)
+        shutil.rmtree(self.tmpdir)
+
+    def names(self, response):
+        return [company['name'] for company in response.data['results']]
+
+    def test_list_reads_from_replica(self):
+        response = self.client.get(reverse('company-list'))
+        self.assertEqual(self.names(response), ['Replica Company'])
+
+    def test_writes_go_to_primary(self):
+        response = self.client.post(reverse('company-list'), {'name': 'New Company'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Company.objects.filter(name='New Company').exists())
+        self.assertFalse(Company.objects.using('replica').filter(name='New Company').exists())
+
+    def test_reads_after_a_write_stay_on_primary(self):
+        with request_routing():
+            allow_replica_reads()
+            self.assertEqual(list(Company.objects.values_list('name', flat=True)), ['Replica Company'])
+            Company.objects.create(name='Written Company')
+            self.assertEqual(
+                list(Company.objects.values_list('name', flat=True)),
+                ['Primary Company', 'Written Company']
+            )
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(list(Company.objects.values_list('name', flat=True)), ['Primary Company'])
@@ -0,0 +1,40 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.db import connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+
+
+class SQLitePragmaHookTest(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def connect(self):
+        settings_dict = dict(connections['default'].settings_dict)
+        settings_dict['NAME'] = str(Path(self.tmpdir) / 'pragmas.sqlite3')
+        wrapper = DatabaseWrapper(settings_dict, alias='pragma_test')
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        return wrapper.connection.execute(f'PRAGMA {name}').fetchone()[0]
+
+    @override_settings(SQLITE_PRAGMAS={'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 7000})
+    def test_new_connections_get_configured_pragmas(self):
+        wrapper = self.connect()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 7000)
+
+    @override_settings(SQLITE_PRAGMAS=None)
+    def test_stock_settings_leave_connections_alone(self):
+        self.assertEqual(self.pragma(self.connect(), 'journal_mode'), 'delete')
+
+    @override_settings(SQLITE_PRAGMAS={'journal_mode': 'WAL; DROP TABLE companies'})
+    def test_rejects_malformed_values(self):
+        with self.assertRaises(ValueError):
+            self.connect()
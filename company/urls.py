@@ -1,8 +1,10 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
+from . import async_views
 from .views import (
     CompanyViewset, SubscriptionPlanViewset,
-    SubscriptionViewset, PaymentViewset
+    SubscriptionViewset, PaymentViewset, UserViewset,
+    AnalyticsViewset
 )
 
 router = DefaultRouter()
@@ -10,7 +12,17 @@ router.register('companies', CompanyViewset)
 router.register('plans', SubscriptionPlanViewset)
 router.register('subscriptions', SubscriptionViewset)
 router.register('payments', PaymentViewset)
+router.register('users', UserViewset)
+router.register('analytics', AnalyticsViewset, basename='analytics')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('async/companies/<int:pk>/', async_views.company_detail, name='async-company-detail'),
+    path(
+        'async/companies/<int:pk>/active_subscription/',
+        async_views.active_subscription,
+        name='async-company-active-subscription'
+    ),
+    path('async/subscriptions/<int:pk>/', async_views.subscription_detail, name='async-subscription-detail'),
+    path('async/users/by_company/', async_views.users_by_company, name='async-users-by-company'),
 ]
\ No newline at end of file
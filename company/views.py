@@ -3,22 +3,48 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from .models import Company, SubscriptionPlan, Subscription, Payment , User
+from .models import Company, SubscriptionPlan, Subscription, Payment , User, PaymentJob, BILLING_PERIODS
 from .serializers import (
     CompanySerializer, CompanyDetailSerializer,
     UserSerializer, SubscriptionPlanSerializer,
     SubscriptionSerializer, SubscriptionDetailSerializer,
-    PaymentSerializer, UserUpdateSerializer
+    PaymentSerializer, UserUpdateSerializer, RevenueSummarySerializer,
+    PaymentJobSerializer
 )
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, Q
+from .analytics import record_bulk_deactivation, revenue_summary
+from .exports import parse_export_bound, parse_export_params, stream_export
+from .conditional import ConditionalGetMixin
+from .fast_read import ValuesListMixin
+from .plan_cache import get_plans
+from .replicas import ReplicaReadsMixin
+from .pagination import (
+    CompanyPagination, SubscriptionPagination,
+    PaymentPagination, UserPagination
+)
 from django.utils import timezone  
+from django.utils.dateparse import parse_date
 from dateutil.relativedelta import relativedelta 
 
 # Create your views here.
 
-class CompanyViewset(viewsets.ModelViewSet):
+class CompanyViewset(ReplicaReadsMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
+    pagination_class = CompanyPagination
+    conditional_related = ('active_subscription',)
+    conditional_related_many = ('users',)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            # CompanyDetailSerializer nests the active subscription and users
+            queryset = queryset.select_related('active_subscription').prefetch_related(
+                Prefetch('users', queryset=User.objects.all(), to_attr='prefetched_users')
+            )
+        return queryset
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -38,7 +64,7 @@ class CompanyViewset(viewsets.ModelViewSet):
         return Response({"status": "company activated"}, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['get'])
-    def List_active_subscriptions(self):
+    def List_active_subscriptions(self, request, pk=None):
         company = self.get_object()
         subscription = company.active_subscription
         if not subscription:
@@ -46,11 +72,23 @@ class CompanyViewset(viewsets.ModelViewSet):
         serializer = SubscriptionDetailSerializer(subscription)
         return Response(serializer.data, status=status.HTTP_200_OK)
      
-class SubscriptionPlanViewset(viewsets.ModelViewSet):
+class SubscriptionPlanViewset(ReplicaReadsMixin, ConditionalGetMixin, viewsets.ModelViewSet):
 
     queryset = SubscriptionPlan.objects.all()
     serializer_class = SubscriptionPlanSerializer
 
+    def list(self, request, *args, **kwargs):
+        """Plans from the plan cache, validators included; ?active=true for active plans only"""
+        plans = get_plans(active_only=request.query_params.get('active') in ('1', 'true'))
+        state = {
+            'updated_at': max((plan.updated_at for plan in plans), default=None),
+            'count': len(plans)
+        }
+        return self._conditional_response(state, self._render_plans, request, plans)
+
+    def _render_plans(self, request, plans):
+        return Response(self.get_serializer(plans, many=True).data)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if not serializer.is_valid():
@@ -69,9 +107,21 @@ class SubscriptionPlanViewset(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
     
 
-class SubscriptionViewset(viewsets.ModelViewSet):
+class SubscriptionViewset(ReplicaReadsMixin, ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = Subscription.objects.all()
     serializer_class = SubscriptionSerializer
+    pagination_class = SubscriptionPagination
+    conditional_related = ('company', 'plan')
+    conditional_related_many = ('payments',)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            # SubscriptionDetailSerializer nests company, plan and payments
+            queryset = queryset.select_related('company', 'plan').prefetch_related(
+                Prefetch('payments', queryset=Payment.objects.all(), to_attr='prefetched_payments')
+            )
+        return queryset
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -107,25 +157,30 @@ class SubscriptionViewset(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def renew(self, request, pk=None):
         subscription = self.get_object()
+        plan = subscription.load_plan()
         
         try:
-            # First, expire any active subscriptions for this company
-            Subscription.objects.filter(
-                company=subscription.company, 
-                status='active'
-            ).update(status='expired')
-
-            # Create new subscription
-            new_subscription = Subscription.objects.create(
-                company=subscription.company,
-                plan=subscription.plan,
-                status='active',
-                start_date=timezone.now(),
-                end_date=timezone.now() + relativedelta(months=1) if subscription.plan.billing_cycle == 'monthly' 
-                        else timezone.now() + relativedelta(years=1),
-                max_users=subscription.max_users,
-                cost_at_signup=subscription.plan.cost
-            )
+            with transaction.atomic():
+                # First, expire any active subscriptions for this company
+                active_subscriptions = Subscription.objects.filter(
+                    company=subscription.company, 
+                    status='active'
+                )
+                record_bulk_deactivation(active_subscriptions, renewal=True)
+                active_subscriptions.update(status='expired', updated_at=timezone.now())
+
+                # Create new subscription, which also moves the company's
+                # active_subscription pointer over to it
+                new_subscription = Subscription(
+                    company=subscription.company,
+                    plan=plan,
+                    status='active',
+                    start_date=timezone.now(),
+                    end_date=timezone.now() + BILLING_PERIODS[plan.billing_cycle],
+                    max_users=subscription.max_users,
+                    cost_at_signup=plan.cost
+                )
+                new_subscription.save(renewal=True)
 
             # Reactivate company if needed
             if subscription.company.status == 'suspended':
@@ -144,12 +199,64 @@ class SubscriptionViewset(viewsets.ModelViewSet):
             )
 
 
+    @action(detail=False, methods=['post'])
+    def bulk_renew(self, request):
+        """Renew every active subscription matching a plan, billing cycle and/or end_date window"""
+        filters = {}
+        try:
+            end_date_from = parse_export_bound(request.data.get('end_date_from'))
+            end_date_to = parse_export_bound(request.data.get('end_date_to'), end_of_day=True)
+            if request.data.get('plan'):
+                try:
+                    filters['plan_id'] = int(request.data['plan'])
+                except (TypeError, ValueError):
+                    raise ValueError("plan must be a plan id")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if request.data.get('billing_cycle'):
+            filters['plan__billing_cycle'] = request.data['billing_cycle']
+        if end_date_from:
+            filters['end_date__gte'] = end_date_from
+        if end_date_to:
+            filters['end_date__lte'] = end_date_to
+        if not filters:
+            return Response(
+                {"error": "Provide plan, billing_cycle, end_date_from or end_date_to"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        renewed, reactivated = Subscription.objects.filter(**filters).bulk_renew()
+        return Response({
+            'status': 'subscriptions renewed',
+            'renewed': renewed,
+            'reactivated_companies': reactivated
+        }, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'])     
     def suspend(self, request, pk=None):
         subscription = self.get_object()
         subscription.suspend()
         return Response({"status": "subscription suspended"}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream subscriptions as CSV or NDJSON, optionally by start_date range"""
+        try:
+            file_format, date_from, date_to = parse_export_params(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        subscriptions = Subscription.objects.order_by('start_date', 'id')
+        if request.query_params.get('status'):
+            subscriptions = subscriptions.filter(status=request.query_params['status'])
+        if date_from:
+            subscriptions = subscriptions.filter(start_date__gte=date_from)
+        if date_to:
+            subscriptions = subscriptions.filter(start_date__lte=date_to)
+        return stream_export(
+            subscriptions, SubscriptionSerializer.Meta.fields, file_format, 'subscriptions'
+        )
+
 
     def update(self, request, *args, **kwargs):
         subscription = self.get_object()
@@ -159,9 +266,10 @@ class SubscriptionViewset(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class PaymentViewset(viewsets.ModelViewSet):
+class PaymentViewset(ReplicaReadsMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
+    pagination_class = PaymentPagination
     
 
     def create(self, request, *args, **kwargs):
@@ -190,17 +298,44 @@ class PaymentViewset(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def process(self, request, pk=None):
+        """Queue the payment for the worker and answer 202 straight away"""
         payment = self.get_object()
-       
-        try:
-            payment.process_payment()
-            if payment.status == "completed":
-                return Response({"status": "payment processed"}, status=status.HTTP_200_OK)
-        except Exception as e:
+        idempotency_key = request.headers.get('Idempotency-Key') or f"payment-{payment.pk}"
+
+        # Retries with a known key get the original job back
+        job = PaymentJob.objects.filter(idempotency_key=idempotency_key).first()
+        if job:
+            if job.payment_id != payment.pk:
+                return Response(
+                    {"error": "Idempotency-Key already used for another payment"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            finished = job.status in ('succeeded', 'failed')
             return Response(
-                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+                {"status": f"payment {job.status}", "job": PaymentJobSerializer(job).data},
+                status=status.HTTP_200_OK if finished else status.HTTP_202_ACCEPTED
+            )
+
+        if payment.status != 'pending':
+            return Response(
+                {"error": f"Payment is already {payment.status}"},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
+        try:
+            with transaction.atomic():
+                job = PaymentJob.objects.create(payment=payment, idempotency_key=idempotency_key)
+        except IntegrityError:
+            # A concurrent retry won the race, or another key is in flight
+            job = PaymentJob.objects.filter(
+                Q(idempotency_key=idempotency_key) |
+                Q(payment=payment, status__in=['queued', 'processing'])
+            ).first()
+        return Response(
+            {"status": "payment queued", "job": PaymentJobSerializer(job).data},
+            status=status.HTTP_202_ACCEPTED
+        )
+
     @action(detail=True, methods=['post'])
     def refund(self,request,pk = None):
         payment = self.get_object()
@@ -213,22 +348,42 @@ class PaymentViewset(viewsets.ModelViewSet):
                 {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
             )   
     
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream payments as CSV or NDJSON, filtered on the status/payment_date index"""
+        try:
+            file_format, date_from, date_to = parse_export_params(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        payments = Payment.objects.order_by('payment_date', 'id')
+        if request.query_params.get('status'):
+            payments = payments.filter(status=request.query_params['status'])
+        if date_from:
+            payments = payments.filter(payment_date__gte=date_from)
+        if date_to:
+            payments = payments.filter(payment_date__lte=date_to)
+        fields = [field.name for field in Payment._meta.concrete_fields]
+        return stream_export(payments, fields, file_format, 'payments')
+
     @action(detail=False, methods=['get'])
     def List_payments_for_subscription(self, request):
-        subscription_id = request.query.params("subscription_id")
+        subscription_id = request.query_params.get("subscription_id")
         if not subscription_id:
             return Response(
                 {"error": "subscription_id query parameter is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
         payments = Payment.objects.filter(subscription_id=subscription_id)
-        serializer = self.get_serializer(payments, many = True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        page = self.paginate_queryset(payments)
+        serializer = self.get_serializer(page, many = True)
+        return self.get_paginated_response(serializer.data)
           
 
-class UserViewset(viewsets.ModelViewSet):
+class UserViewset(ReplicaReadsMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    pagination_class = UserPagination
 
     def create(self, request, *args, **kwargs):
         """Add user for a company"""
@@ -241,8 +396,9 @@ class UserViewset(viewsets.ModelViewSet):
         if not company_id:
             return Response({"error": "company_id required"}, status=status.HTTP_400_BAD_REQUEST)
         users = User.objects.filter(company_id=company_id)
-        serializer = self.get_serializer(users, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(users)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['post'])
     def suspend(self, request, pk=None):
@@ -265,9 +421,8 @@ class UserViewset(viewsets.ModelViewSet):
         user = self.get_object()
         user.is_active = False
         user.save()
-        return Response({"message": "user deactivated"}, status=status.Http_200_OK)
+        return Response({"message": "user deactivated"}, status=status.HTTP_200_OK)
     
-    @action(detail=True, methods=["post"])
     def update(self, request,*args,**kwargs):
         user = self.get_object()
         serializer = UserUpdateSerializer(user, data=request.data,partial=True)
@@ -275,5 +430,40 @@ class UserViewset(viewsets.ModelViewSet):
         serializer.save()
         return Response(UserSerializer(user).data)
 
-        
 
+class AnalyticsViewset(ReplicaReadsMixin, viewsets.ViewSet):
+    replica_actions = ('revenue',)
+
+    @action(detail=False, methods=['get'])
+    def revenue(self, request):
+        """MRR, churn and revenue for a date range, from the daily rollup table"""
+        date_to = timezone.localdate()
+        date_from = date_to - relativedelta(days=30)
+        try:
+            if request.query_params.get('date_to'):
+                date_to = parse_date(request.query_params['date_to'])
+            if request.query_params.get('date_from'):
+                date_from = parse_date(request.query_params['date_from'])
+        except ValueError:
+            date_from = date_to = None
+        if not date_from or not date_to:
+            return Response(
+                {"error": "date_from and date_to must be YYYY-MM-DD dates"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        plan_id = request.query_params.get('plan') or None
+        if plan_id is not None:
+            try:
+                plan_id = int(plan_id)
+            except (TypeError, ValueError):
+                return Response(
+                    {"error": "plan must be a plan id"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        summary = revenue_summary(
+            date_from, date_to,
+            plan_id=plan_id,
+            billing_cycle=request.query_params.get('billing_cycle')
+        )
+        return Response(RevenueSummarySerializer(summary).data)
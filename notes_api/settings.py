@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "company.query_budget.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -49,6 +51,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "company.replicas.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "notes_api.urls"
@@ -78,9 +81,20 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-    }
+    },
+    # Read replica for list/retrieve and analytics (company.replicas). While it
+    # names the primary's database, reads simply stay on the primary; set
+    # DATABASE_REPLICA_NAME to a replicated copy to split the traffic
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get("DATABASE_REPLICA_NAME", BASE_DIR / "db.sqlite3"),
+        "TEST": {"MIRROR": "default"},
+    },
 }
 
+DATABASE_ROUTERS = ["company.replicas.ReplicaRouter"]
+REPLICA_DATABASE = "replica"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -128,6 +142,16 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # orjson-backed JSON, byte-identical to the stock JSONRenderer/JSONParser
+    'DEFAULT_RENDERER_CLASSES': (
+        'company.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'company.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 AUTH_USER_MODEL = 'company.User'
@@ -148,6 +172,11 @@ NOTIFICATION_SETTINGS = {
     'SUBSCRIPTION_EXPIRY_DAYS': 7,
     'ENABLE_SLACK_NOTIFICATIONS': True,
     'ENABLE_EMAIL_NOTIFICATIONS': True,
+    # Slack delivery engine: worker pool size, per-post timeout (seconds)
+    # and an optional URL that replaces every webhook, e.g. a local stub
+    'SLACK_MAX_WORKERS': 8,
+    'SLACK_TIMEOUT': 5,
+    'SLACK_WEBHOOK_OVERRIDE': None,
 }
 
 # Slack Configuration
@@ -179,6 +208,18 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        # One key=value line per request from company.query_budget
+        'requests_file': {
+            'level': 'INFO',
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR / 'logs' / 'requests.log',
+            'formatter': 'verbose',
+        },
+        'console_warnings': {
+            'level': 'WARNING',
+            'class': 'logging.StreamHandler',
+            'formatter': 'verbose',
+        },
     },
     'loggers': {
         'company.notifications': {
@@ -186,6 +227,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'company.query_budget': {
+            'handlers': ['requests_file', 'console_warnings'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -203,4 +249,33 @@ TEMPLATES[0]['DIRS'] = [BASE_DIR / 'templates']  # Update existing TEMPLATES set
 
 
 STRIPE_SECRET_KEY = 'your_stripe_secret_key'
-STRIPE_PUBLIC_KEY = 'your_stripe_public_key'
\ No newline at end of file
+STRIPE_PUBLIC_KEY = 'your_stripe_public_key'
+
+# Provider used by the payment worker; company.payment_providers.StubProvider
+# approves every charge offline
+PAYMENT_PROVIDER = 'company.payment_providers.StripeProvider'
+# Read-through cache for SubscriptionPlan lookups. Local memory is per
+# process, so point PLAN_CACHE_ALIAS at a shared backend (Redis, Memcached)
+# when running several workers; the timeout bounds cross-process staleness
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+PLAN_CACHE_ALIAS = 'default'
+PLAN_CACHE_TIMEOUT = 3600
+
+# Per-request SQL budgets (company.query_budget), keyed by `Viewset.action` or
+# URL name; 'default' covers everything else. Going over logs a warning.
+# Each budget includes the one user lookup JWTAuthentication makes
+QUERY_BUDGETS = {
+    'default': 20,
+    'CompanyViewset.list': 2,
+    'CompanyViewset.retrieve': 4,
+    'SubscriptionPlanViewset.list': 2,
+    'SubscriptionViewset.list': 2,
+    'SubscriptionViewset.retrieve': 4,
+    'PaymentViewset.list': 2,
+    'UserViewset.list': 2,
+    'AnalyticsViewset.revenue': 5,
+}
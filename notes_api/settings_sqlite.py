@@ -0,0 +1,37 @@
+"""
+SQLite production profile for single-host (edge) deployments.
+
+Use with DJANGO_SETTINGS_MODULE=notes_api.settings_sqlite. Every new
+connection gets WAL journaling and the pragmas below through the
+connection_created hook in company.sqlite, and connections persist across
+requests.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+for _database in DATABASES.values():
+    _database.update(
+        # Reuse connections for ten minutes, checking them before reuse
+        CONN_MAX_AGE=600,
+        CONN_HEALTH_CHECKS=True,
+        OPTIONS={
+            # Seconds a connection waits for the write lock; the driver sets
+            # SQLite's busy timeout from it, so no busy_timeout pragma
+            "timeout": 20,
+            # Take the write lock at BEGIN, so a read-then-write transaction
+            # waits on the timeout instead of failing with "database is locked"
+            "transaction_mode": "IMMEDIATE",
+        },
+    )
+
+SQLITE_PRAGMAS = {
+    # Readers no longer block the writer, nor the writer the readers
+    "journal_mode": "WAL",
+    # Durable at checkpoints; safe against corruption under WAL
+    "synchronous": "NORMAL",
+    # 256 MiB memory-mapped I/O and a 64 MiB page cache (negative = KiB)
+    "mmap_size": 268435456,
+    "cache_size": -65536,
+    "temp_store": "MEMORY",
+}